@@ -5,8 +5,8 @@ a = Analysis(
     ['sc_monitor.py'],
     pathex=[],
     binaries=[],
-    datas=[('sc_monitor_config.json', '.'), ('logoStar.ico', '.')],
-    hiddenimports=['tkinter', 'tkinter.ttk', 'tkinter.scrolledtext', 'tkinter.messagebox', 'tkinter.filedialog', 'requests', 'lxml', 'lxml.html'],
+    datas=[('sc_monitor_config.json', '.'), ('logoStar.ico', '.'), ('logoStar.png', '.')],
+    hiddenimports=['tkinter', 'tkinter.ttk', 'tkinter.font', 'tkinter.messagebox', 'tkinter.filedialog', 'requests'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
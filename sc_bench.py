@@ -0,0 +1,416 @@
+"""
+Benchmarks del Star Citizen Log Monitor.
+
+Uso:
+    python sc_bench.py ui [--lines N]
+    python sc_bench.py idle [--seconds N]
+    python sc_bench.py filter [--messages N] [--keywords N] [--players N]
+    python sc_bench.py startup [--runs N]
+    python sc_bench.py latency [--rates N,N,...] [--seconds N] [--overlay]
+
+Cada benchmark se ejecuta en un directorio temporal para no tocar la
+configuración ni la base de datos reales.
+"""
+import argparse
+import contextlib
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import sc_monitor
+
+
+@contextlib.contextmanager
+def temporary_workdir():
+    """Ejecutar dentro de un directorio temporal"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            os.chdir(previous)
+
+
+def create_app(**config):
+    """Crear la aplicación con notificaciones desactivadas"""
+    app = sc_monitor.StarCitizenLogMonitor()
+    app.config.update({'notifications': False}, **config)
+    # La capacidad del historial solo se lee al construir la app (o al aplicar la configuración)
+    if 'message_limit' in config:
+        app.message_ring.resize(config['message_limit'])
+    return app
+
+
+def bench_ui(args):
+    """Líneas por segundo sostenidas hasta el área de mensajes"""
+    with temporary_workdir():
+        app = create_app(message_limit=args.message_limit)
+        total = args.lines
+        produced = threading.Event()
+        result = {'max_backlog': 0}
+
+        def producer():
+            for i in range(total):
+                app.add_message(f"🎯 Player{i % 50} mató a Target{i % 70} con KLWE_LaserRepeater_S3", "neutral")
+            produced.set()
+
+        def check():
+            backlog = app.message_queue.qsize()
+            result['max_backlog'] = max(result['max_backlog'], backlog)
+            if produced.is_set() and backlog == 0:
+                result['elapsed'] = time.perf_counter() - start
+                app.root.destroy()
+            else:
+                app.root.after(10, check)
+
+        start = time.perf_counter()
+        threading.Thread(target=producer, daemon=True).start()
+        app.root.after(10, check)
+        app.root.mainloop()
+        if app.db_manager:
+            app.db_manager.close()
+
+    print(f"Líneas: {total}")
+    print(f"Tiempo: {result['elapsed']:.2f} s")
+    print(f"Líneas/s: {total / result['elapsed']:.0f}")
+    print(f"Cola máxima: {result['max_backlog']}")
+
+
+def bench_idle(args):
+    """CPU y ciclos de la UI con la aplicación en reposo"""
+    with temporary_workdir():
+        app = create_app()
+        ticks = [0]
+        process_message_queue = app.process_message_queue
+
+        def counted_tick():
+            ticks[0] += 1
+            process_message_queue()
+
+        app.process_message_queue = counted_tick
+
+        # Dejar que arranque antes de medir
+        app.root.after(1000, app.root.quit)
+        app.root.mainloop()
+
+        ticks[0] = 0
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        app.root.after(int(args.seconds * 1000), app.root.quit)
+        app.root.mainloop()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+
+        app.root.destroy()
+        if app.db_manager:
+            app.db_manager.close()
+
+    print(f"Tiempo: {elapsed:.1f} s")
+    print(f"CPU: {cpu:.3f} s ({100 * cpu / elapsed:.2f} %)")
+    print(f"Ciclos de UI: {ticks[0]} ({ticks[0] / elapsed:.2f}/s)")
+
+
+def bench_filter(args):
+    """Coste por mensaje del filtro compilado"""
+    config = {
+        'current_user': 'Player0',
+        'show_spawns': False,
+        'muted_keywords': [f"palabra{i}" for i in range(args.keywords)],
+        'muted_players': [f"Muted{i}" for i in range(args.players)],
+        'players_blacklist': [f"Enemy{i}" for i in range(args.players)],
+        'orgs_whitelist': [f"ORG{i}" for i in range(args.players)],
+        'hidden_channels': ['Global']
+    }
+    engine = sc_monitor.FilterEngine(config)
+
+    types = [('death', 'Combat'), ('vehicle', 'Combat'), ('spawn', 'System'),
+             ('chat', 'Local'), ('chat', 'Global'), ('system', 'System')]
+    messages = [
+        (*types[i % len(types)], f"Player{i % 300}",
+         f"🎯 Player{i % 300} mató a Target{i % 70} con KLWE_LaserRepeater_S3 [{i}]")
+        for i in range(args.messages)
+    ]
+
+    accepts = engine.accepts
+    start = time.perf_counter()
+    shown = sum(1 for message in messages if accepts(*message))
+    filter_elapsed = time.perf_counter() - start
+
+    classify = engine.classify
+    start = time.perf_counter()
+    for message in messages:
+        classify(message[2], "ORG1")
+    classify_elapsed = time.perf_counter() - start
+
+    print(f"Mensajes: {args.messages} (mostrados {shown})")
+    print(f"Filtro: {filter_elapsed / args.messages * 1e9:.0f} ns/mensaje")
+    print(f"Clasificación: {classify_elapsed / args.messages * 1e9:.0f} ns/jugador")
+
+
+# Proceso hijo: tiempo hasta que la ventana principal está dibujada
+FIRST_WINDOW_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import sc_monitor
+imported = time.perf_counter()
+app = sc_monitor.StarCitizenLogMonitor()
+app.root.update()
+shown = time.perf_counter()
+print(imported - start, shown - start)
+app.on_closing()
+"""
+
+
+def bench_startup(args):
+    """Tiempo de import y hasta la primera ventana, en procesos nuevos"""
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    import_times, window_times, process_times = [], [], []
+
+    with temporary_workdir():
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", FIRST_WINDOW_SCRIPT, source_dir],
+                                    capture_output=True, text=True, check=True).stdout
+            process_times.append(time.perf_counter() - start)
+            imported, shown = map(float, output.split()[-2:])
+            import_times.append(imported)
+            window_times.append(shown)
+
+        # Módulos más pesados según -X importtime (microsegundos acumulados)
+        importtime = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {source_dir!r}); import sc_monitor"],
+            capture_output=True, text=True, check=True).stderr
+
+    # Imports directos de sc_monitor: un nivel de sangría por debajo
+    direct = []
+    for line in importtime.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            if len(name) - len(name.lstrip()) == 3:
+                direct.append((int(parts[1]), name.strip()))
+
+    print(f"Ejecuciones: {args.runs}")
+    print(f"Import de sc_monitor: {statistics.median(import_times) * 1000:.0f} ms (mediana)")
+    print(f"Hasta la primera ventana: {statistics.median(window_times) * 1000:.0f} ms (mediana)")
+    print(f"Proceso completo: {statistics.median(process_times) * 1000:.0f} ms (mediana)")
+    print("Imports más pesados:")
+    for cumulative, name in sorted(direct, reverse=True)[:10]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+# Proceso escritor: añade bajas sintéticas a Game.log a un ritmo fijo y
+# devuelve por stdout "secuencia:instante" de cada línea escrita
+WRITER_SCRIPT = """
+import sys, time
+from datetime import datetime, timezone
+path, rate, seconds, first = sys.argv[1], float(sys.argv[2]), float(sys.argv[3]), int(sys.argv[4])
+template = ("<{ts}> [Notice] <Actor Death> CActor::Kill: 'Target{victim}' [{victim_id}] in zone 'bench' "
+            "killed by 'Player{killer}' [{killer_id}] using 'Bench#{seq}' [Class unknown] with damage type "
+            "'Bullet' from direction x: 0.1, y: 0.2, z: 0.3 [Team_ActorTech][Actor]\\n")
+total = int(rate * seconds)
+appended = []
+written = 0
+with open(path, 'a', encoding='latin1') as f:
+    start = time.perf_counter()
+    while written < total:
+        due = min(total, int((time.perf_counter() - start) * rate) + 1)
+        now = datetime.now(timezone.utc)
+        ts = now.strftime('%Y-%m-%dT%H:%M:%S.') + f'{now.microsecond // 1000:03d}Z'
+        seqs = range(first + written, first + due)
+        f.write(''.join(template.format(ts=ts, victim=seq % 70, victim_id=1000000 + seq, killer=seq % 50,
+                                        killer_id=2000000 + seq, seq=seq) for seq in seqs))
+        f.flush()
+        appended_at = time.time()
+        appended.extend(f'{seq}:{appended_at:.6f}' for seq in seqs)
+        written = due
+        time.sleep(0.001)
+print(' '.join(appended))
+"""
+
+BENCH_SEQ_RE = re.compile(r"Bench#(\d+)")
+
+
+def percentile(values, fraction):
+    """Percentil (0-1) de una lista, en las mismas unidades"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_latency(args):
+    """Latencia de extremo a extremo: escritura en Game.log → análisis → cola → pantalla"""
+    rates = [float(rate) for rate in args.rates.split(',')]
+    parsed, enqueued, rendered = {}, {}, {}
+    results = []
+    done = threading.Event()
+
+    def seq_of(text):
+        match = BENCH_SEQ_RE.search(text)
+        return int(match.group(1)) if match else None
+
+    with temporary_workdir() as workdir:
+        log_path = os.path.join(workdir, "Game.log")
+        open(log_path, 'w').close()
+
+        app = create_app(log_filename=log_path, web_info=False)
+        app.engine.apply_config()
+
+        # Instantes de cada etapa, anotados desde fuera de la aplicación
+        process_message = app.engine.process_message
+
+        def timed_process_message(message_data):
+            parsed[int(message_data.details['weapon'][6:])] = time.time()
+            return process_message(message_data)
+
+        app.engine.process_message = timed_process_message
+
+        put = app.message_queue.put
+
+        def timed_put(timestamp, message, msg_type, kind=None):
+            put(timestamp, message, msg_type, kind)
+            seq = seq_of(message)
+            if seq is not None:
+                enqueued[seq] = time.time()
+
+        app.message_queue.put = timed_put
+
+        get_batch = app.message_queue.get_batch
+        awaiting = []
+
+        def tracked_get_batch(max_items):
+            batch = get_batch(max_items)
+            awaiting.extend(seq for seq in (seq_of(message) for _, message, _ in batch) if seq is not None)
+            return batch
+
+        app.message_queue.get_batch = tracked_get_batch
+
+        def stamp_rendered(seqs):
+            now = time.time()
+            for seq in seqs:
+                rendered[seq] = now
+
+        def after_paint():
+            # Tk repinta en tareas "idle" ya encoladas; la nuestra va detrás
+            if awaiting:
+                app.root.after_idle(stamp_rendered, awaiting[:])
+                awaiting.clear()
+
+        def wrap(paint):
+            def painted():
+                paint()
+                after_paint()
+            return painted
+
+        def setup():
+            if args.overlay:
+                app.overlay_var.set(True)
+                app.toggle_overlay_mode()
+                app.overlay.redraw = wrap(app.overlay.redraw)
+            else:
+                app.process_message_queue = wrap(app.process_message_queue)
+            app.start_monitoring()
+            threading.Thread(target=drive, daemon=True).start()
+
+        def drive():
+            first = 0
+            for rate in rates:
+                output = subprocess.run([sys.executable, "-c", WRITER_SCRIPT, log_path, str(rate),
+                                         str(args.seconds), str(first)],
+                                        capture_output=True, text=True, check=True).stdout
+                appended = dict((int(seq), float(at)) for seq, at in
+                                (item.split(':') for item in output.split()))
+                first += len(appended)
+
+                # Esperar a que todo lo escrito llegue a pantalla
+                deadline = time.perf_counter() + args.grace
+                while time.perf_counter() < deadline and not all(seq in rendered for seq in appended):
+                    time.sleep(0.05)
+                results.append((rate, appended))
+            done.set()
+
+        def check():
+            if done.is_set():
+                app.on_closing()
+            else:
+                app.root.after(100, check)
+
+        app.root.after(0, setup)
+        app.root.after(100, check)
+        app.root.mainloop()
+
+    print(f"Duración por tasa: {args.seconds:g} s  Vista: {'overlay' if args.overlay else 'ventana principal'}")
+    print(f"{'Tasa/s':>8} {'Escritas':>9} {'Pintadas':>9} {'Perdidas':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8}   "
+          f"{'→análisis':>9} {'→cola':>7} {'→pantalla':>9}")
+    sustainable = None
+    for rate, appended in results:
+        shown = [seq for seq in appended if seq in rendered]
+        total = [(rendered[seq] - appended[seq]) * 1000 for seq in shown]
+        stages = [
+            [(parsed[seq] - appended[seq]) * 1000 for seq in shown if seq in parsed],
+            [(enqueued[seq] - parsed[seq]) * 1000 for seq in shown if seq in parsed and seq in enqueued],
+            [(rendered[seq] - enqueued[seq]) * 1000 for seq in shown if seq in enqueued],
+        ]
+        lost = len(appended) - len(shown)
+        p99 = percentile(total, 0.99)
+        if not lost and p99 <= args.max_p99_ms:
+            sustainable = rate
+        print(f"{rate:>8g} {len(appended):>9} {len(shown):>9} {lost:>9} "
+              f"{percentile(total, 0.5):>8.1f} {percentile(total, 0.95):>8.1f} {p99:>8.1f} "
+              f"{max(total, default=float('nan')):>8.1f}   "
+              + " ".join(f"{percentile(stage, 0.5):>{width}.1f}" for stage, width in zip(stages, (9, 7, 9))))
+    print("Etapas: mediana en ms de cada paso (escritura→análisis→cola→pantalla)")
+    if sustainable is None:
+        print(f"Tasa máxima sostenible: ninguna de las probadas (sin pérdidas y p99 ≤ {args.max_p99_ms:g} ms)")
+    else:
+        print(f"Tasa máxima sostenible: {sustainable:g} líneas/s (sin pérdidas y p99 ≤ {args.max_p99_ms:g} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del Star Citizen Log Monitor")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ui_parser = subparsers.add_parser('ui', help="líneas/s hasta el área de mensajes")
+    ui_parser.add_argument('--lines', type=int, default=50000)
+    ui_parser.add_argument('--message-limit', type=int, default=100000)
+    ui_parser.set_defaults(func=bench_ui)
+
+    idle_parser = subparsers.add_parser('idle', help="CPU en reposo")
+    idle_parser.add_argument('--seconds', type=float, default=10)
+    idle_parser.set_defaults(func=bench_idle)
+
+    filter_parser = subparsers.add_parser('filter', help="ns/mensaje del filtro")
+    filter_parser.add_argument('--messages', type=int, default=200000)
+    filter_parser.add_argument('--keywords', type=int, default=50)
+    filter_parser.add_argument('--players', type=int, default=200)
+    filter_parser.set_defaults(func=bench_filter)
+
+    startup_parser = subparsers.add_parser('startup', help="import y primera ventana")
+    startup_parser.add_argument('--runs', type=int, default=5)
+    startup_parser.set_defaults(func=bench_startup)
+
+    latency_parser = subparsers.add_parser('latency', help="ms desde la escritura en Game.log hasta la pantalla")
+    latency_parser.add_argument('--rates', default="10,100,1000,5000", help="líneas/s a probar, separadas por comas")
+    latency_parser.add_argument('--seconds', type=float, default=5)
+    latency_parser.add_argument('--grace', type=float, default=5, help="espera máxima para vaciar la cola tras cada tasa")
+    latency_parser.add_argument('--max-p99-ms', type=float, default=1000, help="p99 aceptable para considerar una tasa sostenible")
+    latency_parser.add_argument('--overlay', action='store_true', help="medir hasta el overlay en lugar de la ventana principal")
+    latency_parser.set_defaults(func=bench_latency)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
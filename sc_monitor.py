@@ -1,24 +1,24 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
-from PIL import Image, ImageTk
+from tkinter import ttk, messagebox, filedialog, font as tkfont
 import time
 import re
-import requests
-from lxml import html
 import threading
-import queue
-from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
 import json
 import sys
+import argparse
 import os
 import math
+import gc
 import logging
 from pathlib import Path
 import hashlib
 import sqlite3
-from dataclasses import dataclass
+import contextlib
+import gzip
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
-import webbrowser
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -45,6 +45,237 @@ class LogEvent:
     participants: List[str]
     raw_line: str
 
+@dataclass
+class MessageData:
+    """Clase para mensajes extraídos de una línea del log"""
+    timestamp: datetime
+    player_name: str
+    message: str
+    message_type: str
+    channel: str
+    details: Dict = field(default_factory=dict)
+    raw_line: str = ""
+
+@dataclass
+class EngineEvent:
+    """Evento ya procesado por el motor, listo para mostrar o exportar"""
+    timestamp: datetime
+    event_type: str
+    channel: str
+    player_name: str
+    text: str
+    tag: str
+    participants: List[str]
+    details: Dict = field(default_factory=dict)
+    kind: Optional[str] = None  # tipo de baja prioridad para la UI
+    visible: bool = True        # False si lo oculta el filtro
+    raw_line: str = ""
+
+    def to_dict(self) -> Dict:
+        return {
+            'timestamp': self.timestamp.isoformat(),
+            'type': self.event_type,
+            'channel': self.channel,
+            'player': self.player_name,
+            'text': self.text,
+            'tag': self.tag,
+            'participants': self.participants,
+            'details': self.details,
+            'visible': self.visible
+        }
+
+@dataclass
+class MessageRecord:
+    """Mensaje ya formateado del historial en memoria"""
+    __slots__ = ('timestamp', 'text', 'tag')
+    timestamp: str
+    text: str
+    tag: str
+
+    def format(self) -> str:
+        return f"[{self.timestamp}] {self.text}"
+
+@dataclass
+class QueuedMessage:
+    """Mensaje pendiente de mostrar en la cola de la UI"""
+    timestamp: str
+    message: str
+    msg_type: str
+    kind: Optional[str] = None  # tipo de baja prioridad, None = normal
+    count: int = 1
+    alive: bool = True
+
+# Marca de tiempo de cada línea de Game.log
+LOG_TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z)')
+
+# Patrones de eventos de combate de Game.log
+ACTOR_DEATH_RE = re.compile(
+    r"<Actor Death> CActor::Kill: '(?P<victim>[^']+)' \[(?P<victim_id>\d+)\] in zone '(?P<zone>[^']*)' "
+    r"killed by '(?P<killer>[^']+)' \[(?P<killer_id>\d+)\] using '(?P<weapon>[^']*)' \[[^\]]*\] "
+    r"with damage type '(?P<damage>[^']*)'"
+    r"(?: from direction x: (?P<x>[-\d.]+), y: (?P<y>[-\d.]+), z: (?P<z>[-\d.]+))?"
+)
+SPAWN_RE = re.compile(
+    r"<Spawn Flow> .*?Player '(?P<player>[^']+)' \[(?P<player_id>\d+)\] lost reservation for "
+    r"spawnpoint (?P<spawnpoint>\S+)"
+)
+VEHICLE_DESTRUCTION_RE = re.compile(
+    r"<Vehicle Destruction> .*?Vehicle '(?P<vehicle>[^']+)' \[(?P<vehicle_id>\d+)\] in zone '(?P<zone>[^']*)'.*? "
+    r"driven by '(?P<driver>[^']+)' \[[^\]]*\] advanced from destroy level (?P<from_level>\d+) "
+    r"to (?P<to_level>\d+) caused by '(?P<attacker>[^']+)' \[(?P<attacker_id>\d+)\] with '(?P<cause>[^']*)'"
+)
+
+
+def parse_log_line(line: str) -> Optional[MessageData]:
+    """Extraer el mensaje de una línea de Game.log (None si la línea no interesa)"""
+    # Parse timestamp
+    timestamp_match = LOG_TIMESTAMP_RE.search(line)
+    if not timestamp_match:
+        return None
+
+    timestamp_str = timestamp_match.group(1)
+    timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+
+    # Check for different message types
+    message_data = None
+    death_match = ACTOR_DEATH_RE.search(line)
+    vehicle_match = VEHICLE_DESTRUCTION_RE.search(line) if not death_match else None
+    spawn_match = SPAWN_RE.search(line) if not (death_match or vehicle_match) else None
+    chat_match = re.search(r'<(.+?)>\s*(.+)', line)
+
+    # Muertes de actores
+    if death_match:
+        message_data = MessageData(
+            timestamp=timestamp,
+            player_name=death_match.group('killer'),
+            message=line.strip(),
+            message_type='death',
+            channel='Combat',
+            details=death_match.groupdict()
+        )
+
+    # Destrucción de vehículos
+    elif vehicle_match:
+        message_data = MessageData(
+            timestamp=timestamp,
+            player_name=vehicle_match.group('attacker'),
+            message=line.strip(),
+            message_type='vehicle',
+            channel='Combat',
+            details=vehicle_match.groupdict()
+        )
+
+    # Reapariciones
+    elif spawn_match:
+        message_data = MessageData(
+            timestamp=timestamp,
+            player_name=spawn_match.group('player'),
+            message=line.strip(),
+            message_type='spawn',
+            channel='System',
+            details=spawn_match.groupdict()
+        )
+
+    # Chat messages
+    elif chat_match and 'Chat' in line:
+        player_name = chat_match.group(1).strip()
+        message_content = chat_match.group(2).strip()
+
+        # Determine channel
+        channel = 'Global'
+        if 'Party' in line:
+            channel = 'Party'
+        elif 'Org' in line:
+            channel = 'Organization'
+        elif 'Local' in line:
+            channel = 'Local'
+
+        message_data = MessageData(
+            timestamp=timestamp,
+            player_name=player_name,
+            message=message_content,
+            message_type='chat',
+            channel=channel
+        )
+
+    # System messages
+    elif any(keyword in line.lower() for keyword in ['joined', 'left', 'disconnected', 'connected']):
+        if 'joined' in line.lower():
+            player_match = re.search(r'(.+?)\s+joined', line, re.IGNORECASE)
+            if player_match:
+                player_name = player_match.group(1).strip()
+                message_data = MessageData(
+                    timestamp=timestamp,
+                    player_name=player_name,
+                    message=f"{player_name} joined the server",
+                    message_type='system',
+                    channel='System'
+                )
+        elif 'left' in line.lower() or 'disconnected' in line.lower():
+            player_match = re.search(r'(.+?)\s+(?:left|disconnected)', line, re.IGNORECASE)
+            if player_match:
+                player_name = player_match.group(1).strip()
+                message_data = MessageData(
+                    timestamp=timestamp,
+                    player_name=player_name,
+                    message=f"{player_name} left the server",
+                    message_type='system',
+                    channel='System'
+                )
+
+    # Death messages
+    elif any(keyword in line.lower() for keyword in ['killed', 'died', 'destroyed']):
+        death_match = re.search(r'(.+?)\s+(?:killed|died|was destroyed)', line, re.IGNORECASE)
+        if death_match:
+            player_name = death_match.group(1).strip()
+            message_data = MessageData(
+                timestamp=timestamp,
+                player_name=player_name,
+                message=line.strip(),
+                message_type='death',
+                channel='System'
+            )
+
+    # Trade/Economy messages
+    elif any(keyword in line.lower() for keyword in ['purchased', 'sold', 'transaction']):
+        trade_match = re.search(r'(.+?)\s+(?:purchased|sold)', line, re.IGNORECASE)
+        if trade_match:
+            player_name = trade_match.group(1).strip()
+            message_data = MessageData(
+                timestamp=timestamp,
+                player_name=player_name,
+                message=line.strip(),
+                message_type='trade',
+                channel='System'
+            )
+
+    return message_data
+
+
+def is_npc_actor(actor_name: str, actor_id: Optional[str] = None) -> bool:
+    """Determinar si un actor es un PNJ"""
+    if actor_id and actor_id in actor_name:
+        return True
+    return re.search(r"(.+)_\d{6,14}", actor_name) is not None
+
+
+def combat_stats(message_data: MessageData) -> List[Tuple[str, str]]:
+    """Estadísticas (jugador, tipo) que aporta un mensaje; solo cuentan jugadores reales"""
+    details = message_data.details
+    stats = []
+    if message_data.message_type == 'death' and details:
+        victim, killer = details['victim'], details['killer']
+        if killer != victim and killer != 'unknown' and not is_npc_actor(killer, details['killer_id']):
+            stats.append((killer, 'kills'))
+        if not is_npc_actor(victim, details['victim_id']):
+            stats.append((victim, 'deaths'))
+    elif message_data.message_type == 'vehicle' and details:
+        attacker = details['attacker']
+        # Nivel 2 = destrucción completa del vehículo
+        if details['to_level'] == '2' and attacker != 'unknown' and not is_npc_actor(attacker, details['attacker_id']):
+            stats.append((attacker, 'vehicles_destroyed'))
+    return stats
+
 def get_resource_path(relative_path):
     """Obtener la ruta correcta para recursos, funciona tanto en desarrollo como compilado"""
     try:
@@ -53,63 +284,317 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+# Columnas de estadísticas admitidas por update_stats (lista blanca)
+STAT_COLUMNS = ('kills', 'deaths', 'vehicles_destroyed', 'missiles_fired')
+
+STATS_UPSERT_SQL = '''
+    INSERT INTO stats (date, player, kills, deaths, vehicles_destroyed, missiles_fired)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(date, player) DO UPDATE SET
+        kills = kills + excluded.kills,
+        deaths = deaths + excluded.deaths,
+        vehicles_destroyed = vehicles_destroyed + excluded.vehicles_destroyed,
+        missiles_fired = missiles_fired + excluded.missiles_fired
+'''
+
+def _normalize_player_timestamps(conn):
+    """Guardar players.last_updated en el formato de datetime() de SQLite"""
+    # save_player_info guardaba isoformat() ('T' como separador), que no se
+    # compara bien con datetime('now', ...) en get_player_info
+    conn.execute('''
+        UPDATE players SET last_updated = datetime(last_updated)
+        WHERE last_updated IS NOT NULL AND datetime(last_updated) IS NOT NULL
+    ''')
+
+def _create_events_fts(conn):
+    """Índice FTS5 sobre events, mantenido por triggers en cada inserción"""
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+                message, participants, raw_line,
+                content='events', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        # SQLite compilado sin FTS5: la búsqueda usará LIKE
+        logger.warning(f"FTS5 no disponible, búsqueda sin índice: {e}")
+        return
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+            INSERT INTO events_fts(rowid, message, participants, raw_line)
+            VALUES (new.id, new.message, new.participants, new.raw_line);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+            INSERT INTO events_fts(events_fts, rowid, message, participants, raw_line)
+            VALUES ('delete', old.id, old.message, old.participants, old.raw_line);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE ON events BEGIN
+            INSERT INTO events_fts(events_fts, rowid, message, participants, raw_line)
+            VALUES ('delete', old.id, old.message, old.participants, old.raw_line);
+            INSERT INTO events_fts(rowid, message, participants, raw_line)
+            VALUES (new.id, new.message, new.participants, new.raw_line);
+        END
+    ''')
+    # Indexar los eventos que ya existieran
+    conn.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+def build_fts_query(text: str) -> str:
+    """Convertir texto libre en una consulta FTS5 segura (términos AND, 'xx*' = prefijo)"""
+    terms = []
+    for token in text.split():
+        prefix = token.endswith('*')
+        token = token.rstrip('*').replace('"', '""')
+        if token:
+            terms.append(f'"{token}"*' if prefix else f'"{token}"')
+    return ' '.join(terms)
+
+def _enable_incremental_vacuum(conn):
+    """Pedir auto_vacuum=INCREMENTAL; en una base con datos el VACUUM que lo aplica
+    se hace en el mantenimiento en reposo (DatabaseManager.incremental_vacuum)"""
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+# El cambio de auto_vacuum no puede hacerse dentro de una transacción
+_enable_incremental_vacuum.transactional = False
+
+# Tablas de agregados de estadísticas: ámbito -> (tabla, columna clave)
+ROLLUP_TABLES = {'player': ('player_rollups', 'player'), 'org': ('org_rollups', 'org')}
+
+def _rollup_upsert_sql(table, key_column):
+    """UPSERT que suma deltas en una tabla de agregados"""
+    columns = ', '.join(STAT_COLUMNS)
+    updates = ',\n        '.join(f"{c} = {c} + excluded.{c}" for c in STAT_COLUMNS)
+    return f'''
+    INSERT INTO {table} (granularity, bucket, {key_column}, {columns})
+    VALUES (?, ?, ?, {', '.join('?' * len(STAT_COLUMNS))})
+    ON CONFLICT(granularity, {key_column}, bucket) DO UPDATE SET
+        {updates}
+'''
+
+ROLLUP_UPSERT_SQL = {scope: _rollup_upsert_sql(*table) for scope, table in ROLLUP_TABLES.items()}
+
+def rollup_buckets(hour_bucket: str) -> Dict[str, str]:
+    """Buckets de hora, día y semana (lunes) de una hora 'YYYY-MM-DD HH'"""
+    day = hour_bucket[:10]
+    monday = datetime.strptime(day, '%Y-%m-%d').date()
+    monday -= timedelta(days=monday.weekday())
+    return {'hour': hour_bucket, 'day': day, 'week': monday.isoformat()}
+
+def split_rollup_range(start: datetime, end: Optional[datetime] = None,
+                       hours_from: Optional[datetime] = None) -> List[Tuple[str, str, str]]:
+    """Cubrir [start, end) con los buckets más gruesos posibles: [(granularidad, primero, último)]
+
+    hours_from es la primera hora con buckets por hora completos (antes solo quedan días: el
+    histórico rellenado y lo podado por la retención); un día parcial anterior se toma entero.
+    """
+    now = datetime.utcnow()
+    if end is None or end >= now:
+        # No hay datos futuros: los buckets en curso pueden usarse enteros
+        end = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        end += timedelta(days=7 - end.weekday())
+
+    def has_hours(moment):
+        return hours_from is not None and moment >= hours_from
+
+    cur = start.replace(minute=0, second=0, microsecond=0)
+    if cur.hour and not has_hours(cur):
+        cur = cur.replace(hour=0)
+    end_day = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    if end > end_day and not has_hours(end_day):
+        end = end_day + timedelta(days=1)
+
+    pieces = []
+    while cur < end:
+        if cur.hour == 0 and cur.weekday() == 0 and cur + timedelta(days=7) <= end:
+            granularity, step, label = 'week', timedelta(days=7), cur.strftime('%Y-%m-%d')
+        elif cur.hour == 0 and cur + timedelta(days=1) <= end:
+            granularity, step, label = 'day', timedelta(days=1), cur.strftime('%Y-%m-%d')
+        else:
+            granularity, step, label = 'hour', timedelta(hours=1), cur.strftime('%Y-%m-%d %H')
+
+        if pieces and pieces[-1][0] == granularity:
+            pieces[-1][2] = label
+        else:
+            pieces.append([granularity, label, label])
+        cur += step
+    return [tuple(piece) for piece in pieces]
+
+def _backfill_stats_rollups(conn):
+    """Crear las tablas de agregados y rellenarlas con el histórico de stats"""
+    sums = ', '.join(f"SUM({c})" for c in STAT_COLUMNS)
+    for scope, (table, key_column) in ROLLUP_TABLES.items():
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                granularity TEXT,
+                bucket TEXT,
+                {key_column} TEXT,
+                {', '.join(f"{c} INTEGER DEFAULT 0" for c in STAT_COLUMNS)},
+                PRIMARY KEY (granularity, {key_column}, bucket)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(granularity, bucket)")
+
+    # stats no guarda la hora: el histórico solo se agrega por día y semana
+    for granularity, bucket in (('day', 's.date'), ('week', "date(s.date, 'weekday 0', '-6 days')")):
+        conn.execute(f'''
+            INSERT OR IGNORE INTO player_rollups (granularity, bucket, player, {', '.join(STAT_COLUMNS)})
+            SELECT '{granularity}', {bucket}, s.player, {sums}
+            FROM stats s GROUP BY 2, 3
+        ''')
+        conn.execute(f'''
+            INSERT OR IGNORE INTO org_rollups (granularity, bucket, org, {', '.join(STAT_COLUMNS)})
+            SELECT '{granularity}', {bucket}, p.main_org, {sums}
+            FROM stats s JOIN players p ON p.handle = s.player
+            WHERE p.main_org != '' GROUP BY 2, 3
+        ''')
+
+# Migraciones del esquema: la migración i se aplica al pasar de user_version i-1 a i.
+# Cada una es una lista de sentencias SQL o una función que recibe la conexión.
+SCHEMA_MIGRATIONS = [
+    # 1: esquema inicial
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS players (
+            handle TEXT PRIMARY KEY,
+            main_org TEXT,
+            main_org_name TEXT,
+            org_rank TEXT,
+            enlisted TEXT,
+            location TEXT,
+            fluency TEXT,
+            last_updated TIMESTAMP,
+            cache_hash TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS stats (
+            date TEXT,
+            player TEXT,
+            kills INTEGER DEFAULT 0,
+            deaths INTEGER DEFAULT 0,
+            vehicles_destroyed INTEGER DEFAULT 0,
+            missiles_fired INTEGER DEFAULT 0,
+            PRIMARY KEY (date, player)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TIMESTAMP,
+            event_type TEXT,
+            message TEXT,
+            participants TEXT,
+            raw_line TEXT
+        )
+        ''',
+    ],
+    # 2: índices para get_player_info, get_player_stats y consultas por fecha de eventos
+    [
+        "CREATE INDEX IF NOT EXISTS idx_players_last_updated ON players(last_updated)",
+        "CREATE INDEX IF NOT EXISTS idx_stats_player_date ON stats(player, date)",
+        "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp)",
+    ],
+    # 3: formato homogéneo de fechas en players
+    _normalize_player_timestamps,
+    # 4: búsqueda de texto completo en eventos
+    _create_events_fts,
+    # 5: agregados de eventos caducados
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS event_rollups (
+            granularity TEXT,
+            bucket TEXT,
+            event_type TEXT,
+            count INTEGER DEFAULT 0,
+            PRIMARY KEY (granularity, bucket, event_type)
+        )
+        ''',
+    ],
+    # 6: compactación incremental en tiempo de inactividad
+    _enable_incremental_vacuum,
+    # 7: agregados por hora/día/semana de jugadores y organizaciones
+    _backfill_stats_rollups,
+]
+
+# Granularidades de event_rollups -> longitud del prefijo de timestamp que define el bucket
+EVENT_ROLLUP_GRANULARITIES = {'hour': 13, 'day': 10}
+
 class DatabaseManager:
     """Gestor de base de datos para cache de jugadores y estadísticas"""
 
     def __init__(self, db_path="sc_monitor.db"):
         self.db_path = db_path
+        self.pending_stats = {}  # (hora, player, org) -> deltas en el orden de STAT_COLUMNS
+        self.stats_lock = threading.Lock()
+        self.pending_events = []
+        self.events_lock = threading.Lock()
+        self.fts_enabled = False
+        self.performance_monitor = None  # PerformanceMonitor que mide las escrituras
+        self.flush_interval = 30.0
+        self.flush_stop = threading.Event()
+        self.flush_thread = None
+        self.last_activity = 0.0
+        self.last_retention = 0.0
+        self.retention = {
+            'events_days': 0,  # 0 = conservar siempre (la búsqueda cubre todo el histórico)
+            'stats_days': 365,
+            'players_days': 30,
+            'rollup_hours_days': 30,
+            'archive_dir': None,
+            'interval': 3600,
+            'idle_after': 60
+        }
         self.init_database()
 
     def init_database(self):
-        """Inicializar base de datos"""
+        """Inicializar base de datos y aplicar migraciones pendientes"""
         try:
             with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                # Tabla de jugadores
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS players (
-                        handle TEXT PRIMARY KEY,
-                        main_org TEXT,
-                        main_org_name TEXT,
-                        org_rank TEXT,
-                        enlisted TEXT,
-                        location TEXT,
-                        fluency TEXT,
-                        last_updated TIMESTAMP,
-                        cache_hash TEXT
-                    )
-                ''')
-
-                # Tabla de estadísticas
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS stats (
-                        date TEXT,
-                        player TEXT,
-                        kills INTEGER DEFAULT 0,
-                        deaths INTEGER DEFAULT 0,
-                        vehicles_destroyed INTEGER DEFAULT 0,
-                        missiles_fired INTEGER DEFAULT 0,
-                        PRIMARY KEY (date, player)
-                    )
-                ''')
-
-                # Tabla de eventos
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS events (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        timestamp TIMESTAMP,
-                        event_type TEXT,
-                        message TEXT,
-                        participants TEXT,
-                        raw_line TEXT
-                    )
-                ''')
-
-                conn.commit()
+                # Solo surte efecto en una base nueva, y antes de activar WAL
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("PRAGMA journal_mode=WAL")
+                self.migrate(conn)
+                self.fts_enabled = self._has_fts(conn)
+                if not self.fts_enabled:
+                    # La migración 4 se da por hecha aunque SQLite no tuviera FTS5:
+                    # si la versión actual sí lo tiene, crear el índice ahora
+                    _create_events_fts(conn)
+                    conn.commit()
+                    self.fts_enabled = self._has_fts(conn)
         except Exception as e:
             logger.error(f"Error inicializando base de datos: {e}")
 
+    @staticmethod
+    def _has_fts(conn) -> bool:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_fts'").fetchone() is not None
+
+    def migrate(self, conn):
+        """Aplicar las migraciones posteriores a PRAGMA user_version"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target in range(version + 1, len(SCHEMA_MIGRATIONS) + 1):
+            migration = SCHEMA_MIGRATIONS[target - 1]
+            transactional = getattr(migration, 'transactional', True)
+            try:
+                if transactional:
+                    conn.execute("BEGIN")
+                if callable(migration):
+                    migration(conn)
+                else:
+                    for statement in migration:
+                        conn.execute(statement)
+                # user_version forma parte de la transacción: se revierte si algo falla
+                conn.execute(f"PRAGMA user_version = {target}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            logger.info(f"Base de datos migrada a la versión {target}")
+
     def get_player_info(self, handle: str) -> Optional[PlayerInfo]:
         """Obtener información de jugador desde cache"""
         try:
@@ -138,6 +623,7 @@ class DatabaseManager:
 
     def save_player_info(self, player_info: PlayerInfo):
         """Guardar información de jugador en cache"""
+        start = time.perf_counter()
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
@@ -153,161 +639,1149 @@ class DatabaseManager:
                     player_info.enlisted,
                     player_info.location,
                     player_info.fluency,
-                    datetime.now().isoformat()
+                    datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
                 ))
                 conn.commit()
         except Exception as e:
             logger.error(f"Error guardando info de jugador: {e}")
+        self.record_write_time(start)
+
+    def update_stats(self, timestamp: datetime, player: str, stat_type: str,
+                     org: str = "", amount: int = 1):
+        """Acumular estadística en memoria; se vuelca a disco con flush_stats"""
+        if stat_type not in STAT_COLUMNS:
+            logger.error(f"Tipo de estadística no válido: {stat_type}")
+            return
+
+        column = STAT_COLUMNS.index(stat_type)
+        key = (timestamp.strftime('%Y-%m-%d %H'), player, org)
+        self.last_activity = time.time()
+        with self.stats_lock:
+            deltas = self.pending_stats.get(key)
+            if deltas is None:
+                deltas = self.pending_stats[key] = [0] * len(STAT_COLUMNS)
+            deltas[column] += amount
+
+    def flush_stats(self):
+        """Volcar las estadísticas pendientes (stats y agregados) en un único lote UPSERT"""
+        with self.stats_lock:
+            if not self.pending_stats:
+                return
+            pending, self.pending_stats = self.pending_stats, {}
+        start = time.perf_counter()
+
+        def add(rows, key, deltas):
+            current = rows.setdefault(key, [0] * len(STAT_COLUMNS))
+            for i, value in enumerate(deltas):
+                current[i] += value
+
+        daily = {}
+        rollups = {scope: {} for scope in ROLLUP_TABLES}
+        for (hour, player, org), deltas in pending.items():
+            buckets = rollup_buckets(hour)
+            add(daily, (buckets['day'], player), deltas)
+            for granularity, bucket in buckets.items():
+                add(rollups['player'], (granularity, bucket, player), deltas)
+                if org:
+                    add(rollups['org'], (granularity, bucket, org), deltas)
 
-    def update_stats(self, date: str, player: str, stat_type: str):
-        """Actualizar estadísticas de jugador"""
         try:
             with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(f'''
-                    INSERT OR IGNORE INTO stats (date, player, {stat_type})
-                    VALUES (?, ?, 1)
-                ''', (date, player))
+                conn.executemany(STATS_UPSERT_SQL, [(*key, *deltas) for key, deltas in daily.items()])
+                for scope, rows in rollups.items():
+                    conn.executemany(ROLLUP_UPSERT_SQL[scope], [(*key, *deltas) for key, deltas in rows.items()])
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error volcando estadísticas: {e}")
+            # Devolver los deltas a memoria para no perderlos
+            with self.stats_lock:
+                for key, deltas in pending.items():
+                    add(self.pending_stats, key, deltas)
+        self.record_write_time(start)
+
+    def save_event(self, event: LogEvent):
+        """Encolar un evento; se escribe en lote con flush_events"""
+        self.last_activity = time.time()
+        with self.events_lock:
+            self.pending_events.append((
+                event.timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                event.event_type,
+                event.message,
+                ', '.join(event.participants),
+                event.raw_line
+            ))
+
+    def flush_events(self):
+        """Insertar los eventos pendientes en una sola transacción"""
+        with self.events_lock:
+            if not self.pending_events:
+                return
+            pending, self.pending_events = self.pending_events, []
+        start = time.perf_counter()
 
-                cursor.execute(f'''
-                    UPDATE stats SET {stat_type} = {stat_type} + 1
-                    WHERE date = ? AND player = ?
-                ''', (date, player))
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany('''
+                    INSERT INTO events (timestamp, event_type, message, participants, raw_line)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', pending)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error guardando eventos: {e}")
+            with self.events_lock:
+                self.pending_events[:0] = pending
+        self.record_write_time(start)
+
+    def record_write_time(self, start):
+        """Anotar la duración de una escritura iniciada en start (perf_counter)"""
+        if self.performance_monitor:
+            self.performance_monitor.record('db_write', time.perf_counter() - start)
+
+    def search_events(self, query: str, limit: int = 50, offset: int = 0,
+                      order: str = 'rank', conn=None) -> Tuple[List[Dict], bool]:
+        """Buscar eventos por texto; devuelve (resultados, hay_más)"""
+        self.flush_events()
+        hits = []
+        try:
+            with self._reader(conn) as conn:
+                if self.fts_enabled:
+                    match = build_fts_query(query)
+                    if not match:
+                        return [], False
+                    order_by = "events_fts.rowid DESC" if order == 'recent' else "rank"
+                    rows = conn.execute(f'''
+                        SELECT e.id, e.timestamp, e.event_type, e.message,
+                               snippet(events_fts, -1, '[', ']', '…', 12)
+                        FROM events_fts JOIN events e ON e.id = events_fts.rowid
+                        WHERE events_fts MATCH ?
+                        ORDER BY {order_by}
+                        LIMIT ? OFFSET ?
+                    ''', (match, limit + 1, offset)).fetchall()
+                else:
+                    pattern = f"%{query.strip()}%"
+                    rows = conn.execute('''
+                        SELECT id, timestamp, event_type, message, message
+                        FROM events
+                        WHERE message LIKE ? OR raw_line LIKE ?
+                        ORDER BY id DESC
+                        LIMIT ? OFFSET ?
+                    ''', (pattern, pattern, limit + 1, offset)).fetchall()
+
+                for row in rows[:limit]:
+                    hits.append({
+                        'id': row[0],
+                        'timestamp': row[1],
+                        'event_type': row[2],
+                        'message': row[3],
+                        'snippet': row[4]
+                    })
+                return hits, len(rows) > limit
+        except Exception as e:
+            logger.error(f"Error buscando eventos: {e}")
+        return hits, False
+
+    def flush(self):
+        """Volcar a disco todas las escrituras pendientes"""
+        self.flush_stats()
+        self.flush_events()
+
+    def start_auto_flush(self, interval: float = 30.0):
+        """Iniciar volcado periódico en segundo plano"""
+        if self.flush_thread and self.flush_thread.is_alive():
+            return
+        self.flush_interval = interval
+        self.flush_stop.clear()
+        self.flush_thread = threading.Thread(target=self._auto_flush_loop, daemon=True)
+        self.flush_thread.start()
+
+    def _auto_flush_loop(self):
+        """Bucle del hilo de volcado periódico"""
+        while not self.flush_stop.wait(self.flush_interval):
+            self.flush()
+            if time.time() - self.last_activity >= self.retention['idle_after']:
+                self.run_idle_maintenance()
+
+    def set_retention(self, **settings):
+        """Configurar la retención (días a 0 = conservar siempre)"""
+        self.retention.update(settings)
+
+    def run_idle_maintenance(self):
+        """Mantenimiento para momentos sin actividad: retención y compactación"""
+        now = time.time()
+        if now - self.last_retention >= self.retention['interval']:
+            self.last_retention = now
+            self.apply_retention()
+        self.incremental_vacuum()
+
+    def apply_retention(self) -> Dict:
+        """Agregar, archivar y borrar los datos más antiguos que la retención"""
+        self.flush()
+        removed = {'events': 0, 'stats': 0, 'players': 0}
+        try:
+            events_days = self.retention['events_days']
+            if events_days:
+                cutoff = (datetime.utcnow() - timedelta(days=events_days)).strftime('%Y-%m-%d %H:%M:%S')
+                removed['events'] = self.expire_events(cutoff, self.retention['archive_dir'])
 
+            with sqlite3.connect(self.db_path) as conn:
+                if self.retention['stats_days']:
+                    removed['stats'] = conn.execute(
+                        "DELETE FROM stats WHERE date < date('now', ?)",
+                        (f"-{int(self.retention['stats_days'])} days",)
+                    ).rowcount
+                if self.retention['rollup_hours_days']:
+                    # Los agregados por día y semana se conservan
+                    hour_cutoff = (datetime.utcnow() - timedelta(days=self.retention['rollup_hours_days'])).strftime('%Y-%m-%d %H')
+                    for table, _ in ROLLUP_TABLES.values():
+                        conn.execute(f"DELETE FROM {table} WHERE granularity = 'hour' AND bucket < ?",
+                                     (hour_cutoff,))
+                if self.retention['players_days']:
+                    removed['players'] = conn.execute(
+                        "DELETE FROM players WHERE last_updated < datetime('now', ?)",
+                        (f"-{int(self.retention['players_days'])} days",)
+                    ).rowcount
                 conn.commit()
+
+            if any(removed.values()):
+                logger.info(f"Retención aplicada: {removed}")
         except Exception as e:
-            logger.error(f"Error actualizando estadísticas: {e}")
+            logger.error(f"Error aplicando retención: {e}")
+        return removed
+
+    def expire_events(self, cutoff: str, archive_dir: Optional[str] = None, batch_size: int = 5000) -> int:
+        """Pasar a event_rollups (y opcionalmente archivar) los eventos anteriores a cutoff y borrarlos"""
+        removed = 0
+        with sqlite3.connect(self.db_path) as conn:
+            if archive_dir:
+                self.recover_archive(conn, archive_dir)
+            while True:
+                rows = conn.execute('''
+                    SELECT id, timestamp, event_type, message, participants, raw_line
+                    FROM events WHERE timestamp < ? ORDER BY id LIMIT ?
+                ''', (cutoff, batch_size)).fetchall()
+                if not rows:
+                    break
+
+                # El lote se prepara aparte y solo pasa al archivo una vez borrado de la base
+                parts = self.archive_events(rows, archive_dir) if archive_dir else []
+
+                # Los eventos del lote son los de [primer id, último id] anteriores a cutoff
+                batch = (rows[0][0], rows[-1][0], cutoff)
+                for granularity, length in EVENT_ROLLUP_GRANULARITIES.items():
+                    conn.execute('''
+                        INSERT INTO event_rollups (granularity, bucket, event_type, count)
+                        SELECT ?, substr(timestamp, 1, ?), event_type, COUNT(*)
+                        FROM events WHERE id BETWEEN ? AND ? AND timestamp < ?
+                        GROUP BY 2, 3
+                        ON CONFLICT(granularity, bucket, event_type) DO UPDATE SET
+                            count = count + excluded.count
+                    ''', (granularity, length, *batch))
+                removed += conn.execute(
+                    "DELETE FROM events WHERE id BETWEEN ? AND ? AND timestamp < ?", batch
+                ).rowcount
+                conn.commit()
+                for part in parts:
+                    self._finalize_archive_part(part)
+        return removed
+
+    def archive_events(self, rows, archive_dir: str) -> List[str]:
+        """Escribir eventos como JSON Lines comprimidos, un fichero .part por día
+
+        Los .part se añaden a events-<día>.jsonl.gz con _finalize_archive_part cuando
+        el borrado de esos eventos ya está confirmado; así un fallo entre ambos pasos
+        no archiva el mismo lote dos veces.
+        """
+        os.makedirs(archive_dir, exist_ok=True)
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[1][:10], []).append(row)
+
+        parts = []
+        for day, day_rows in by_day.items():
+            path = os.path.join(archive_dir, f"events-{day}.{day_rows[0][0]}-{day_rows[-1][0]}.part")
+            parts.append(path)
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                for row in day_rows:
+                    f.write(json.dumps({
+                        'timestamp': row[1],
+                        'event_type': row[2],
+                        'message': row[3],
+                        'participants': row[4],
+                        'raw_line': row[5]
+                    }, ensure_ascii=False) + '\n')
+        return parts
 
-    def get_player_stats(self, player: str, days: int = 7) -> Dict:
-        """Obtener estadísticas de jugador"""
+    @staticmethod
+    def _finalize_archive_part(part: str):
+        """Añadir un .part a su archivo del día (gzip admite miembros concatenados)"""
+        path = part.rsplit('.', 2)[0] + '.jsonl.gz'
+        with open(part, 'rb') as src, open(path, 'ab') as dst:
+            dst.write(src.read())
+        os.remove(part)
+
+    def recover_archive(self, conn, archive_dir: str):
+        """Resolver los .part de una ejecución interrumpida"""
+        if not os.path.isdir(archive_dir):
+            return
+        for name in sorted(os.listdir(archive_dir)):
+            if not name.endswith('.part'):
+                continue
+            part = os.path.join(archive_dir, name)
+            try:
+                first_id = int(name.rsplit('.', 2)[1].split('-')[0])
+                # Si el primer evento sigue en la base el borrado no llegó a confirmarse
+                if conn.execute("SELECT 1 FROM events WHERE id = ?", (first_id,)).fetchone():
+                    os.remove(part)
+                else:
+                    self._finalize_archive_part(part)
+            except Exception as e:
+                logger.error(f"Error recuperando archivo de eventos {name}: {e}")
+
+    def incremental_vacuum(self, max_pages: int = 2000):
+        """Devolver al sistema parte de las páginas libres"""
         try:
             with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT SUM(kills), SUM(deaths), SUM(vehicles_destroyed), SUM(missiles_fired)
-                    FROM stats 
-                    WHERE player = ? AND date >= date('now', '-{} days')
-                '''.format(days), (player,))
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    # Base anterior a auto_vacuum: un VACUUM completo, una sola vez y en reposo
+                    logger.info("Activando la compactación incremental (VACUUM completo)...")
+                    start = time.perf_counter()
+                    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    conn.execute("VACUUM")
+                    logger.info(f"Compactación incremental activada en {time.perf_counter() - start:.1f} s")
+                    return
+                free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if free_pages:
+                    # execute() solo avanza un paso (una página); executescript lo completa
+                    conn.executescript(f"PRAGMA incremental_vacuum({min(free_pages, max_pages)});")
+                conn.execute("PRAGMA optimize")
+        except Exception as e:
+            logger.error(f"Error compactando base de datos: {e}")
 
-                row = cursor.fetchone()
-                if row:
-                    return {
-                        'kills': row[0] or 0,
-                        'deaths': row[1] or 0,
-                        'vehicles_destroyed': row[2] or 0,
-                        'missiles_fired': row[3] or 0
-                    }
+    def close(self):
+        """Detener el volcado periódico y volcar lo pendiente"""
+        self.flush_stop.set()
+        if self.flush_thread and self.flush_thread is not threading.current_thread():
+            self.flush_thread.join(timeout=5)
+        self.flush()
+
+    def get_player_stats(self, player: str, days: int = 7) -> Dict:
+        """Obtener estadísticas de jugador"""
+        since = datetime.combine(datetime.utcnow().date() - timedelta(days=days), datetime.min.time())
+        return self.get_range_stats('player', player, since)
+
+    def connect_readonly(self):
+        """Conexión de solo lectura, utilizable desde otro hilo"""
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def _reader(self, conn=None):
+        """Usar la conexión dada o abrir una nueva"""
+        return contextlib.nullcontext(conn) if conn is not None else sqlite3.connect(self.db_path)
+
+    def get_range_stats(self, scope: str, key: str, start: Optional[datetime] = None,
+                        end: Optional[datetime] = None, conn=None) -> Dict:
+        """Sumar los agregados de un jugador u organización en [start, end) (UTC)"""
+        table, key_column = ROLLUP_TABLES[scope]
+        stats = dict.fromkeys(STAT_COLUMNS, 0)
+        try:
+            with self._reader(conn) as conn:
+                pieces = self._rollup_pieces(conn, table, start, end)
+                sums = ', '.join(f"SUM({c})" for c in STAT_COLUMNS)
+                for granularity, first, last in pieces:
+                    row = conn.execute(f'''
+                        SELECT {sums} FROM {table}
+                        WHERE granularity = ? AND {key_column} = ? AND bucket BETWEEN ? AND ?
+                    ''', (granularity, key, first, last)).fetchone()
+                    for column, value in zip(STAT_COLUMNS, row):
+                        stats[column] += value or 0
         except Exception as e:
             logger.error(f"Error obteniendo estadísticas: {e}")
-        return {'kills': 0, 'deaths': 0, 'vehicles_destroyed': 0, 'missiles_fired': 0}
 
+        # Sumar los deltas aún no volcados para que la lectura sea exacta
+        first_hour = start.strftime('%Y-%m-%d %H') if start else ''
+        end_hour = end.strftime('%Y-%m-%d %H') if end else '9999'
+        with self.stats_lock:
+            for (hour, player, org), deltas in self.pending_stats.items():
+                owner = player if scope == 'player' else org
+                if owner == key and first_hour <= hour < end_hour:
+                    for column, value in zip(STAT_COLUMNS, deltas):
+                        stats[column] += value
+        return stats
+
+    def get_leaderboard(self, scope: str, start: Optional[datetime] = None,
+                        end: Optional[datetime] = None, limit: int = 10,
+                        order_by: str = 'kills', conn=None) -> List[Dict]:
+        """Clasificación de jugadores u organizaciones en [start, end) (UTC)"""
+        if order_by not in STAT_COLUMNS:
+            order_by = 'kills'
+        table, key_column = ROLLUP_TABLES[scope]
+        self.flush_stats()
+        try:
+            with self._reader(conn) as conn:
+                pieces = self._rollup_pieces(conn, table, start, end)
+                if not pieces:
+                    return []
+                union = ' UNION ALL '.join(
+                    f"SELECT * FROM {table} WHERE granularity = ? AND bucket BETWEEN ? AND ?"
+                    for _ in pieces
+                )
+                sums = ', '.join(f"SUM({c}) AS {c}" for c in STAT_COLUMNS)
+                rows = conn.execute(f'''
+                    SELECT {key_column}, {sums} FROM ({union})
+                    GROUP BY {key_column} ORDER BY {order_by} DESC LIMIT ?
+                ''', [value for piece in pieces for value in piece] + [limit]).fetchall()
+                return [dict(zip((key_column,) + STAT_COLUMNS, row)) for row in rows]
+        except Exception as e:
+            logger.error(f"Error obteniendo clasificación: {e}")
+        return []
+
+    def _rollup_pieces(self, conn, table, start, end):
+        """Rangos de buckets que cubren [start, end); sin start, desde la primera semana"""
+        if start is None:
+            first_week = conn.execute(
+                f"SELECT MIN(bucket) FROM {table} WHERE granularity = 'week'"
+            ).fetchone()[0]
+            if first_week is None:
+                return []
+            start = datetime.strptime(first_week, '%Y-%m-%d')
+        first_hour = conn.execute(
+            f"SELECT MIN(bucket) FROM {table} WHERE granularity = 'hour'"
+        ).fetchone()[0]
+        # La primera hora registrada puede estar a medias (actualización a mitad de hora)
+        hours_from = datetime.strptime(first_hour, '%Y-%m-%d %H') + timedelta(hours=1) if first_hour else None
+        return split_rollup_range(start, end, hours_from)
+
+
+class RotatingBloomFilter:
+    """Dos filtros de Bloom que se alternan para olvidar lo más antiguo"""
+
+    def __init__(self, bits=1 << 20, hashes=4, rotate_after=100000):
+        self.bits = bits
+        self.hashes = min(hashes, 4)  # las posiciones salen de una huella de 16 bytes
+        self.rotate_after = rotate_after
+        self.current = bytearray(bits // 8)
+        self.previous = bytearray(bits // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes):
+        return [int.from_bytes(key[i * 4:i * 4 + 4], 'little') % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, key: bytes):
+        positions = self._positions(key)
+        return any(all(table[p >> 3] & (1 << (p & 7)) for p in positions)
+                   for table in (self.current, self.previous))
+
+    def add(self, key: bytes):
+        for p in self._positions(key):
+            self.current[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+        if self.count >= self.rotate_after:
+            self.previous = self.current
+            self.current = bytearray(self.bits // 8)
+            self.count = 0
+
+    def forget_previous(self):
+        """Liberar la tabla antigua; queda apuntando a la actual hasta la próxima rotación"""
+        self.previous = self.current
+
+
+class EventDeduplicator:
+    """Eventos ya vistos en una ventana de tiempo, con memoria fija"""
+
+    def __init__(self, window=600.0, capacity=20000, bloom=False):
+        self.window = window
+        self.capacity = capacity
+        self.recent = OrderedDict()  # huella -> segundos del evento
+        self.high_water = None       # evento más reciente visto
+        self.bloom = RotatingBloomFilter(rotate_after=capacity * 5) if bloom else None
 
-class NotificationSystem:
-    """Sistema de notificaciones mejorado"""
+    @staticmethod
+    def fingerprint(timestamp: datetime, event_type: str, participants) -> bytes:
+        data = "\x1f".join([timestamp.isoformat(), event_type, *map(str, participants)])
+        return hashlib.blake2b(data.encode('utf-8', 'replace'), digest_size=16).digest()
+
+    def seen(self, timestamp: datetime, event_type: str, participants) -> bool:
+        """True si el evento ya se procesó; si no, queda registrado"""
+        seconds = timestamp.timestamp()
+
+        # El log se escribe en orden: algo anterior a la ventana es una relectura
+        if self.high_water is not None and seconds < self.high_water - self.window:
+            return True
+        if self.high_water is None or seconds > self.high_water:
+            self.high_water = seconds
+
+        # Olvidar lo que ya quedó fuera de la ventana
+        limit = self.high_water - self.window
+        while self.recent:
+            oldest = next(iter(self.recent.values()))
+            if oldest >= limit:
+                break
+            self.recent.popitem(last=False)
+
+        key = self.fingerprint(timestamp, event_type, participants)
+        if key in self.recent:
+            return True
+        if self.bloom is not None and key in self.bloom:
+            return True
+
+        self.recent[key] = seconds
+        if len(self.recent) > self.capacity:
+            self.recent.popitem(last=False)
+        if self.bloom is not None:
+            self.bloom.add(key)
+        return False
+
+    def shrink(self):
+        """Quedarse con la mitad más reciente de las huellas; devuelve (antes, después)"""
+        before = len(self.recent)
+        keep = before // 2
+        # Se sustituye el diccionario entero en vez de vaciarlo mientras el lector lo usa
+        self.recent = OrderedDict(list(self.recent.items())[before - keep:])
+        if self.bloom is not None:
+            self.bloom.forget_previous()
+        return before, keep
+
+    def reset(self):
+        self.recent.clear()
+        self.high_water = None
+        if self.bloom is not None:
+            self.bloom = RotatingBloomFilter(rotate_after=self.capacity * 5)
+
+
+class UIEventQueue:
+    """Cola acotada de mensajes para la UI con agrupación de ráfagas"""
+
+    POLICIES = ('drop_oldest', 'drop_newest')
+
+    # Nombre de los tipos de baja prioridad en el resumen de descartes
+    LOW_PRIORITY_LABELS = {'spawn': 'reapariciones', 'npc_death': 'muertes de PNJ'}
+
+    def __init__(self, maxsize=5000, policy='drop_oldest'):
+        self.maxsize = max(1, maxsize)
+        self.policy = policy if policy in self.POLICIES else 'drop_oldest'
+        self.lock = threading.Lock()
+        self.entries = deque()
+        self.low_entries = deque()
+        self.pending = {}  # (mensaje, tipo) -> QueuedMessage pendiente
+        self.live = 0
+        self.dropped = {}  # tipo de baja prioridad -> descartados
+        self.skipped = 0   # mensajes normales descartados
+        self.dropped_total = 0  # descartados ya resumidos
+        # Aviso al consumidor cuando llega algo con la cola vacía
+        self.on_wakeup = None
+        self.wakeup_armed = True
+
+    def qsize(self):
+        return self.live
+
+    def put(self, timestamp, message, msg_type, kind=None):
+        """Encolar un mensaje; los repetidos pendientes se agrupan como ×N"""
+        key = (message, msg_type)
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry is not None:
+                entry.count += 1
+                return
+
+            if self.live >= self.maxsize and not self._make_room(kind):
+                return
+
+            entry = QueuedMessage(timestamp, message, msg_type, kind)
+            self.entries.append(entry)
+            self.pending[key] = entry
+            self.live += 1
+            if kind:
+                self.low_entries.append(entry)
+
+            wake = self.wakeup_armed and self.on_wakeup is not None
+            self.wakeup_armed = False
+
+        if wake:
+            self.on_wakeup()
+
+    def _make_room(self, kind):
+        """Liberar un hueco según la política; False si se descarta el nuevo"""
+        # Los eventos de baja prioridad se sacrifican primero
+        if kind:
+            self.dropped[kind] = self.dropped.get(kind, 0) + 1
+            return False
 
-    def __init__(self, parent):
+        while self.low_entries:
+            victim = self.low_entries.popleft()
+            if victim.alive:
+                self._discard(victim)
+                self.dropped[victim.kind] = self.dropped.get(victim.kind, 0) + victim.count
+                return True
+
+        if self.policy == 'drop_newest':
+            self.skipped += 1
+            return False
+
+        while self.entries:
+            victim = self.entries.popleft()
+            if victim.alive:
+                self._discard(victim)
+                self.skipped += victim.count
+                return True
+        return True
+
+    def _discard(self, entry):
+        entry.alive = False
+        self.live -= 1
+        key = (entry.message, entry.msg_type)
+        if self.pending.get(key) is entry:
+            del self.pending[key]
+
+    def get_batch(self, max_items):
+        """Extraer hasta max_items mensajes como (timestamp, texto, tipo)"""
+        batch = []
+        with self.lock:
+            summary = self._drop_summary()
+            if summary:
+                batch.append((datetime.now().strftime("%H:%M:%S"), summary, "warning"))
+
+            while self.entries and len(batch) < max_items:
+                entry = self.entries.popleft()
+                if not entry.alive:
+                    continue
+                self._discard(entry)
+                text = entry.message if entry.count == 1 else f"{entry.message} ×{entry.count}"
+                batch.append((entry.timestamp, text, entry.msg_type))
+
+            while self.low_entries and not self.low_entries[0].alive:
+                self.low_entries.popleft()
+
+            # Con la cola vacía el próximo put vuelve a despertar al consumidor
+            self.wakeup_armed = self.live == 0
+        return batch
+
+    def _drop_summary(self):
+        """Texto con lo descartado desde el último lote, o None"""
+        parts = [f"{count} {self.LOW_PRIORITY_LABELS.get(kind, kind)}"
+                 for kind, count in self.dropped.items()]
+        if self.skipped:
+            parts.append(f"{self.skipped} eventos")
+        self.dropped_total += sum(self.dropped.values()) + self.skipped
+        self.dropped = {}
+        self.skipped = 0
+        if not parts:
+            return None
+        return f"⏭ Saturación: omitidos {', '.join(parts)}"
+
+    def shed(self, keep=100):
+        """Descartar lo más antiguo hasta dejar keep mensajes; el próximo lote lo resume"""
+        shed = 0
+        with self.lock:
+            while self.live > keep and self.entries:
+                entry = self.entries.popleft()
+                if not entry.alive:
+                    continue
+                self._discard(entry)
+                if entry.kind:
+                    self.dropped[entry.kind] = self.dropped.get(entry.kind, 0) + entry.count
+                else:
+                    self.skipped += entry.count
+                shed += entry.count
+            while self.low_entries and not self.low_entries[0].alive:
+                self.low_entries.popleft()
+        return shed
+
+    def dropped_count(self):
+        """Total de mensajes descartados por saturación desde el arranque"""
+        with self.lock:
+            return self.dropped_total + sum(self.dropped.values()) + self.skipped
+
+
+class MessageRing:
+    """Historial de mensajes de capacidad fija (buffer circular)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.items: List[Optional[MessageRecord]] = [None] * self.capacity
+        self.start = 0
+        self.size = 0
+        # Número de secuencia del registro más antiguo; crece al descartar
+        self.first_seq = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, record: MessageRecord):
+        """Añadir un registro, descartando el más antiguo si está lleno"""
+        if self.size < self.capacity:
+            self.items[(self.start + self.size) % self.capacity] = record
+            self.size += 1
+        else:
+            self.items[self.start] = record
+            self.start = (self.start + 1) % self.capacity
+            self.first_seq += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def slice(self, first: int, count: int) -> List[MessageRecord]:
+        """Registros desde la posición first (0 = el más antiguo)"""
+        first = max(0, first)
+        last = min(self.size, first + count)
+        return [self.items[(self.start + i) % self.capacity] for i in range(first, last)]
+
+    def __iter__(self):
+        return iter(self.slice(0, self.size))
+
+    def clear(self):
+        self.first_seq += self.size
+        self.items = [None] * self.capacity
+        self.start = 0
+        self.size = 0
+
+    def resize(self, capacity: int):
+        """Cambiar la capacidad conservando los registros más recientes"""
+        capacity = max(1, capacity)
+        if capacity == self.capacity:
+            return
+        records = self.slice(max(0, self.size - capacity), capacity)
+        first_seq = self.first_seq + self.size - len(records)
+        self.capacity = capacity
+        self.clear()
+        self.extend(records)
+        self.first_seq = first_seq
+
+    def get_text(self) -> str:
+        """Historial completo como texto plano"""
+        return "".join(f"{record.format()}\n" for record in self)
+
+
+class MessageView:
+    """Vista virtualizada del historial: solo se renderizan las filas visibles"""
+
+    # Filas extra renderizadas fuera de la zona visible
+    MARGIN = 5
+
+    def __init__(self, parent, ring: MessageRing, font):
+        self.ring = ring
+        self.top_seq = 0
+        self.follow = True
+        self.all_selected = False
+
+        self.frame = tk.Frame(parent, bg='#1a1a1a')
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.text = tk.Text(
+            self.frame,
+            wrap=tk.WORD,
+            bg='#2a2a2a',
+            fg='#ffffff',
+            insertbackground='white',
+            font=font,
+            height=10
+        )
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.line_height = tkfont.Font(font=font).metrics('linespace')
+
+        # El desplazamiento se hace sobre el historial, no sobre el widget
+        self.text.bind("<MouseWheel>", self.on_mousewheel)
+        self.text.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.text.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.text.bind("<Prior>", lambda e: self.scroll_by(-self.visible_rows()))
+        self.text.bind("<Next>", lambda e: self.scroll_by(self.visible_rows()))
+        self.text.bind("<Control-Home>", lambda e: self.scroll_to(0))
+        self.text.bind("<Control-End>", lambda e: self.scroll_to(len(self.ring)))
+        self.text.bind("<Button-1>", self.on_click, add='+')
+        self.text.bind("<Configure>", lambda e: self.render())
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def visible_rows(self) -> int:
+        return max(1, self.text.winfo_height() // self.line_height)
+
+    def set_font(self, font):
+        """Cambiar la fuente y volver a renderizar"""
+        self.text.config(font=font)
+        self.line_height = tkfont.Font(font=font).metrics('linespace')
+        self.render()
+
+    def render(self):
+        """Volver a pintar las filas visibles desde el historial"""
+        total = len(self.ring)
+        rows = self.visible_rows()
+        last_top = max(0, total - rows)
+
+        if self.follow:
+            # Siguiendo el final: margen por encima y scroll al último
+            top = last_top
+            first = max(0, total - rows - self.MARGIN)
+        else:
+            top = min(max(0, self.top_seq - self.ring.first_seq), last_top)
+            first = top
+        self.top_seq = self.ring.first_seq + top
+
+        chunks = []
+        for record in self.ring.slice(first, rows + self.MARGIN):
+            chunks.extend((f"[{record.timestamp}] ", "timestamp", record.text, record.tag or (), "\n", ()))
+
+        self.text.delete("1.0", tk.END)
+        if chunks:
+            self.text.insert("1.0", *chunks)
+        if self.all_selected:
+            self.text.tag_add(tk.SEL, "1.0", tk.END)
+        if self.follow:
+            self.text.see(tk.END)
+        self.update_scrollbar(top, rows, total)
+
+    def refresh(self):
+        """Notificar registros nuevos en el historial"""
+        if self.follow:
+            self.render()
+        else:
+            # Fuera del final solo cambia la proporción del scroll
+            top = max(0, self.top_seq - self.ring.first_seq)
+            self.update_scrollbar(top, self.visible_rows(), len(self.ring))
+
+    def update_scrollbar(self, top, rows, total):
+        if total:
+            self.scrollbar.set(top / total, min(1.0, (top + rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, top: int):
+        """Mostrar el historial a partir de la posición top"""
+        rows = self.visible_rows()
+        last_top = max(0, len(self.ring) - rows)
+        top = max(0, min(top, last_top))
+        self.follow = top >= last_top
+        self.top_seq = self.ring.first_seq + top
+        self.render()
+        return "break"
+
+    def scroll_by(self, rows: int):
+        return self.scroll_to(self.top_seq - self.ring.first_seq + rows)
+
+    def on_scrollbar(self, *args):
+        """Comando de la barra de scroll (moveto / scroll)"""
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.ring)))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible_rows()
+            self.scroll_by(step)
+
+    def on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def on_click(self, event):
+        self.all_selected = False
+
+    def select_all(self):
+        """Seleccionar todo el historial, no solo lo visible"""
+        self.all_selected = True
+        self.text.tag_add(tk.SEL, "1.0", tk.END)
+
+    def clear(self):
+        self.ring.clear()
+        self.follow = True
+        self.all_selected = False
+        self.render()
+
+
+class OverlayRenderer:
+    """Overlay ligero: últimos K mensajes en un Canvas redibujado a ritmo fijo"""
+
+    # Colores por tag, los mismos que el área de mensajes
+    COLORS = {
+        "user": "#ffff00", "crew": "#00ff00", "enemy": "#ff0000",
+        "friendly": "#00ff00", "neutral": "#ffa500", "info": "#00ffff",
+        "warning": "#ff8800", "success": "#88ff88"
+    }
+    PADDING = 4
+
+    def __init__(self, parent, geometry, font, fps=10, alpha=0.8):
         self.parent = parent
-        self.notifications = []
-        self.max_notifications = 5
+        self.frame_interval = max(1, int(1000 / max(1, fps)))
+        self.last_draw = 0.0
+        self.draw_id = None
+        self.dirty = False
 
-    def show_notification(self, title: str, message: str, notification_type: str = "info", duration: int = 5000):
-        """Mostrar notificación emergente"""
-        try:
-            # Crear ventana de notificación
-            notification = tk.Toplevel(self.parent.root)
-            notification.title(title)
-            notification.geometry("300x100")
-            notification.configure(bg='#2a2a2a')
-            notification.overrideredirect(True)
-            notification.wm_attributes("-topmost", True)
-            notification.wm_attributes("-alpha", 0.9)
-
-            # Posicionar en esquina superior derecha
-            x = notification.winfo_screenwidth() - 320
-            y = 20 + len(self.notifications) * 110
-            notification.geometry(f"300x100+{x}+{y}")
-
-            # Configurar colores según tipo
-            colors = {
-                "info": "#2d4a5a",
-                "warning": "#5a4a2d",
-                "error": "#5a2d2d",
-                "success": "#2d5a2d"
-            }
-            bg_color = colors.get(notification_type, "#2d4a5a")
+        self.window = tk.Toplevel(parent.root)
+        self.window.overrideredirect(True)
+        self.window.wm_attributes("-topmost", True)
+        self.window.wm_attributes("-alpha", alpha)
+        self.window.geometry(geometry)
+
+        self.canvas = tk.Canvas(self.window, bg='#1a1a1a', highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+
+        # Número fijo de filas según el alto del overlay
+        size = re.match(r'(\d+)x(\d+)', geometry)
+        height = int(size.group(2)) if size else 120
+        line_height = tkfont.Font(font=font).metrics('linespace')
+        rows = max(1, (height - 2 * self.PADDING) // line_height)
+
+        self.lines = deque(maxlen=rows)
+        self.drawn = [None] * rows
+        self.items = [
+            self.canvas.create_text(self.PADDING, self.PADDING + i * line_height,
+                                    anchor='nw', text="", fill='#ffffff', font=font)
+            for i in range(rows)
+        ]
+
+        # Arrastrar para mover; clic derecho para volver a la ventana normal
+        self.canvas.bind('<Button-1>', self.start_drag)
+        self.canvas.bind('<B1-Motion>', self.drag_window)
+        self.canvas.bind('<Button-3>', lambda e: parent.exit_overlay_mode())
+
+    def push(self, records):
+        """Añadir mensajes; el redibujado se agrupa al siguiente fotograma"""
+        for record in records[-self.lines.maxlen:]:
+            self.lines.append((record.format(), self.COLORS.get(record.tag, '#ffffff')))
+        self.dirty = True
+        if self.draw_id is None:
+            elapsed = (time.perf_counter() - self.last_draw) * 1000
+            delay = max(0, int(self.frame_interval - elapsed))
+            self.draw_id = self.window.after(delay, self.redraw)
+
+    def redraw(self):
+        """Actualizar solo los elementos del Canvas que han cambiado"""
+        self.draw_id = None
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.last_draw = time.perf_counter()
+
+        # Los más recientes abajo
+        offset = len(self.items) - len(self.lines)
+        for i, item in enumerate(self.items):
+            line = self.lines[i - offset] if i >= offset else ("", '#ffffff')
+            if self.drawn[i] != line:
+                self.canvas.itemconfigure(item, text=line[0], fill=line[1])
+                self.drawn[i] = line
+
+    def geometry(self):
+        return self.window.geometry()
+
+    def start_drag(self, event):
+        """Iniciar arrastre del overlay"""
+        self.drag_start_x = event.x
+        self.drag_start_y = event.y
+
+    def drag_window(self, event):
+        """Arrastrar el overlay"""
+        x = self.window.winfo_pointerx() - self.drag_start_x
+        y = self.window.winfo_pointery() - self.drag_start_y
+        self.window.geometry(f"+{x}+{y}")
+
+    def destroy(self):
+        if self.draw_id is not None:
+            self.window.after_cancel(self.draw_id)
+        self.window.destroy()
+
+
+class NotificationSlot:
+    """Ventana de notificación reutilizable del pool"""
+
+    def __init__(self, root, on_close):
+        self.window = tk.Toplevel(root)
+        self.window.overrideredirect(True)
+        self.window.wm_attributes("-topmost", True)
+        self.window.configure(bg='#2a2a2a')
+        self.window.withdraw()
 
-            # Frame principal
-            main_frame = tk.Frame(notification, bg=bg_color, relief=tk.RAISED, bd=1)
-            main_frame.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+        self.frame = tk.Frame(self.window, relief=tk.RAISED, bd=1)
+        self.frame.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+        self.title_label = tk.Label(self.frame, font=('Arial', 10, 'bold'), fg='white')
+        self.title_label.pack(pady=(5, 0))
+        self.msg_label = tk.Label(self.frame, font=('Arial', 9), fg='white', wraplength=280)
+        self.msg_label.pack(pady=(0, 5))
+        self.close_btn = tk.Button(self.frame, text="×", command=lambda: on_close(self),
+                                   fg='white', font=('Arial', 12, 'bold'), relief=tk.FLAT, width=2)
+        self.close_btn.place(relx=1.0, rely=0.0, anchor='ne', x=-5, y=5)
 
-            # Título
-            title_label = tk.Label(main_frame, text=title, font=('Arial', 10, 'bold'),
-                                 bg=bg_color, fg='white')
-            title_label.pack(pady=(5, 0))
+        self.expires = 0.0
+        self.alpha = 0.0
 
-            # Mensaje
-            msg_label = tk.Label(main_frame, text=message, font=('Arial', 9),
-                               bg=bg_color, fg='white', wraplength=280)
-            msg_label.pack(pady=(0, 5))
+    def show(self, title, message, bg_color, expires):
+        for widget in (self.frame, self.title_label, self.msg_label, self.close_btn):
+            widget.configure(bg=bg_color)
+        self.title_label.configure(text=title)
+        self.msg_label.configure(text=message)
+        self.expires = expires
+        self.alpha = 0.0
+        self.window.wm_attributes("-alpha", 0.0)
+        self.window.deiconify()
 
-            # Botón cerrar
-            close_btn = tk.Button(main_frame, text="×", command=lambda: self.close_notification(notification),
-                                bg=bg_color, fg='white', font=('Arial', 12, 'bold'),
-                                relief=tk.FLAT, width=2)
-            close_btn.place(relx=1.0, rely=0.0, anchor='ne', x=-5, y=5)
+    def place(self, index):
+        x = self.window.winfo_screenwidth() - 320
+        self.window.geometry(f"300x100+{x}+{20 + index * 110}")
 
-            # Añadir a lista
-            self.notifications.append(notification)
+    def hide(self):
+        self.window.withdraw()
 
-            # Auto-cerrar después del tiempo especificado
-            notification.after(duration, lambda: self.close_notification(notification))
 
-            # Efecto de aparición
-            self.fade_in(notification)
+class NotificationSystem:
+    """Sistema de notificaciones con ventanas reutilizables y agrupación"""
+
+    # Ciclo del temporizador compartido mientras hay animación
+    TICK_MS = 50
+    COLORS = {
+        "info": "#2d4a5a",
+        "warning": "#5a4a2d",
+        "error": "#5a2d2d",
+        "success": "#2d5a2d"
+    }
+    # Nombre en plural de cada grupo para los resúmenes
+    GROUP_LABELS = {'kill': 'bajas', 'death': 'muertes'}
+
+    def __init__(self, parent, max_notifications=5, rate_window=10.0):
+        self.parent = parent
+        self.max_notifications = max_notifications
+        self.rate_window = rate_window
+        self.slots = []    # ventanas creadas, como mucho max_notifications
+        self.active = []   # ventanas visibles, en orden de pantalla
+        self.pending = deque()
+        self.pending_lock = threading.Lock()
+        self.groups = {}   # grupo -> [inicio de ventana, acumulados, título, tipo, último mensaje]
+        self.timer_id = None
+
+    def show_notification(self, title: str, message: str, notification_type: str = "info",
+                          duration: int = 5000, group: Optional[str] = None):
+        """Encolar una notificación; se puede llamar desde cualquier hilo"""
+        with self.pending_lock:
+            self.pending.append((title, message, notification_type, duration, group or title))
+        try:
+            self.parent.root.after(0, self.start_timer)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def start_timer(self):
+        if self.timer_id is None:
+            self.timer_id = self.parent.root.after(0, self.tick)
 
+    def tick(self):
+        """Temporizador único: caducidad, cola, resúmenes y animación"""
+        self.timer_id = None
+        now = time.monotonic()
+        try:
+            expired = [slot for slot in self.active if now >= slot.expires]
+            for slot in expired:
+                self.close_notification(slot)
+
+            # Los resúmenes vencidos salen antes que los avisos nuevos
+            self.flush_groups(now)
+
+            with self.pending_lock:
+                pending, self.pending = self.pending, deque()
+            for title, message, notification_type, duration, group in pending:
+                self.dispatch(now, title, message, notification_type, duration, group)
+
+            animating = False
+            for slot in self.active:
+                if slot.alpha < 0.9:
+                    slot.alpha = min(0.9, slot.alpha + 0.1)
+                    slot.window.wm_attributes("-alpha", slot.alpha)
+                    animating = True
         except Exception as e:
-            logger.error(f"Error mostrando notificación: {e}")
+            logger.error(f"Error actualizando notificaciones: {e}")
+            animating = False
+
+        # Sin nada visible ni pendiente el temporizador se detiene
+        wakeups = [slot.expires for slot in self.active]
+        wakeups += [start + self.rate_window for start, count, *_ in self.groups.values() if count]
+        if animating:
+            self.timer_id = self.parent.root.after(self.TICK_MS, self.tick)
+        elif wakeups or self.groups:
+            next_wakeup = min(wakeups) if wakeups else now + self.rate_window
+            delay = max(self.TICK_MS, int((next_wakeup - now) * 1000))
+            self.timer_id = self.parent.root.after(delay, self.tick)
+
+    def dispatch(self, now, title, message, notification_type, duration, group):
+        """Mostrar ahora o acumular en el grupo si hay ráfaga o no hay hueco"""
+        state = self.groups.get(group)
+        if state is not None and now - state[0] < self.rate_window:
+            state[1] += 1
+            state[4] = message
+        elif len(self.active) >= self.max_notifications:
+            if state is None:
+                self.groups[group] = [now, 1, title, notification_type, message]
+            else:
+                state[1] += 1
+                state[4] = message
+        else:
+            self.display(now, title, message, notification_type, duration)
+            self.groups[group] = [now, 0, title, notification_type, message]
+
+    def flush_groups(self, now):
+        """Mostrar un resumen por grupo al cerrar su ventana de tiempo"""
+        for group, state in list(self.groups.items()):
+            start, count, title, notification_type, message = state
+            if now - start < self.rate_window:
+                continue
+            if not count:
+                del self.groups[group]
+            elif len(self.active) < self.max_notifications:
+                summary = title
+                if count > 1:
+                    label = self.GROUP_LABELS.get(group, title)
+                    summary = f"{count} {label} en {self.rate_window:.0f} s"
+                self.display(now, summary, message, notification_type, 5000)
+                self.groups[group] = [now, 0, title, notification_type, message]
+
+    def display(self, now, title, message, notification_type, duration):
+        """Mostrar en una ventana libre del pool"""
+        free = [slot for slot in self.slots if slot not in self.active]
+        if free:
+            slot = free[0]
+        else:
+            slot = NotificationSlot(self.parent.root, self.close_notification)
+            self.slots.append(slot)
+
+        bg_color = self.COLORS.get(notification_type, "#2d4a5a")
+        slot.show(title, message, bg_color, now + duration / 1000)
+        slot.place(len(self.active))
+        self.active.append(slot)
 
-    def close_notification(self, notification):
-        """Cerrar notificación"""
+    def close_notification(self, slot):
+        """Ocultar una notificación y devolverla al pool"""
         try:
-            if notification in self.notifications:
-                self.notifications.remove(notification)
-                notification.destroy()
+            if slot in self.active:
+                self.active.remove(slot)
+                slot.hide()
                 self.reposition_notifications()
         except Exception as e:
             logger.error(f"Error cerrando notificación: {e}")
 
     def reposition_notifications(self):
         """Reposicionar notificaciones restantes"""
-        for i, notification in enumerate(self.notifications):
+        for i, slot in enumerate(self.active):
             try:
-                x = notification.winfo_screenwidth() - 320
-                y = 20 + i * 110
-                notification.geometry(f"300x100+{x}+{y}")
-            except:
+                slot.place(i)
+            except tk.TclError:
                 pass
 
-    def fade_in(self, window, alpha=0.0):
-        """Efecto de aparición gradual"""
-        try:
-            if alpha < 0.9:
-                window.wm_attributes("-alpha", alpha)
-                window.after(50, lambda: self.fade_in(window, alpha + 0.1))
-            else:
-                window.wm_attributes("-alpha", 0.9)
-        except:
-            pass
-
 class StatsWindow:
     """Ventana de estadísticas"""
 
+    # Periodos seleccionables (None = todo el histórico)
+    RANGES = [
+        ("Últimas 24 horas", timedelta(hours=24)),
+        ("Últimos 7 días", timedelta(days=7)),
+        ("Últimos 30 días", timedelta(days=30)),
+        ("Último año", timedelta(days=365)),
+        ("Todo", None)
+    ]
+
     def __init__(self, parent, db_manager):
         self.parent = parent
         self.db = db_manager
+        self.load_id = 0
+        self.cancelled = threading.Event()
+        self.active_conn = None
         self.window = tk.Toplevel(parent.root)
         self.setup_window()
         self.setup_ui()
+        self.window.bind('<Destroy>', self.on_destroy)
         self.load_stats()
 
     def setup_window(self):
@@ -325,9 +1799,8 @@ class StatsWindow:
         except:
             pass
 
-        # Hacer modal
+        # Sin grab_set: el monitor sigue usable mientras se cargan las consultas
         self.window.transient(self.parent.root)
-        self.window.grab_set()
 
     def setup_ui(self):
         """Configurar interfaz de estadísticas"""
@@ -339,7 +1812,23 @@ class StatsWindow:
         title_label = tk.Label(main_frame, text="📊 Estadísticas de Combate", 
                              font=('Arial', 16, 'bold'),
                              bg='#1a1a1a', fg='white')
-        title_label.pack(pady=(0, 20))
+        title_label.pack(pady=(0, 10))
+
+        # Selector de periodo
+        range_frame = tk.Frame(main_frame, bg='#1a1a1a')
+        range_frame.pack(fill=tk.X, pady=(0, 10))
+
+        tk.Label(range_frame, text="Periodo:", bg='#1a1a1a', fg='white').pack(side=tk.LEFT)
+
+        self.range_var = tk.StringVar(value=self.RANGES[1][0])
+        range_combo = ttk.Combobox(range_frame, textvariable=self.range_var,
+                                 values=[name for name, _ in self.RANGES],
+                                 state='readonly', width=18)
+        range_combo.pack(side=tk.LEFT, padx=5)
+        range_combo.bind('<<ComboboxSelected>>', lambda e: self.load_stats())
+
+        self.status_label = tk.Label(range_frame, text="", bg='#1a1a1a', fg='#888888')
+        self.status_label.pack(side=tk.RIGHT)
 
         # Notebook para pestañas
         self.notebook = ttk.Notebook(main_frame)
@@ -351,6 +1840,9 @@ class StatsWindow:
         # Pestaña de estadísticas globales
         self.setup_global_stats()
 
+        # Pestaña de rendimiento del pipeline
+        self.setup_performance_stats()
+
         # Botón cerrar
         close_btn = tk.Button(main_frame, text="Cerrar", command=self.window.destroy,
                             bg='#404040', fg='white', width=12)
@@ -361,22 +1853,20 @@ class StatsWindow:
         personal_frame = tk.Frame(self.notebook, bg='#2a2a2a')
         self.notebook.add(personal_frame, text="Personal")
 
-        # Estadísticas del usuario actual
-        user_stats = self.db.get_player_stats(self.parent.CURRENT_USER)
-
         stats_frame = tk.LabelFrame(personal_frame, text=f"Estadísticas de {self.parent.CURRENT_USER}",
                                   bg='#2a2a2a', fg='white', font=('Arial', 12, 'bold'))
         stats_frame.pack(fill=tk.X, padx=10, pady=10)
 
         # Crear grid de estadísticas
-        stats_data = [
-            ("🎯 Eliminaciones", user_stats['kills']),
-            ("💀 Muertes", user_stats['deaths']),
-            ("🚁 Vehículos destruidos", user_stats['vehicles_destroyed']),
-            ("🚀 Misiles disparados", user_stats['missiles_fired'])
+        stats_labels = [
+            ('kills', "🎯 Eliminaciones"),
+            ('deaths', "💀 Muertes"),
+            ('vehicles_destroyed', "🚁 Vehículos destruidos"),
+            ('missiles_fired', "🚀 Misiles disparados")
         ]
 
-        for i, (label, value) in enumerate(stats_data):
+        self.stat_value_labels = {}
+        for i, (key, label) in enumerate(stats_labels):
             row = i // 2
             col = i % 2
 
@@ -385,36 +1875,341 @@ class StatsWindow:
 
             tk.Label(stat_frame, text=label, bg='#404040', fg='white',
                    font=('Arial', 10)).pack(pady=2)
-            tk.Label(stat_frame, text=str(value), bg='#404040', fg='#ffff00',
-                   font=('Arial', 14, 'bold')).pack(pady=2)
+            self.stat_value_labels[key] = tk.Label(stat_frame, text="…", bg='#404040', fg='#ffff00',
+                                                 font=('Arial', 14, 'bold'))
+            self.stat_value_labels[key].pack(pady=2)
 
         # Configurar grid
         stats_frame.grid_columnconfigure(0, weight=1)
         stats_frame.grid_columnconfigure(1, weight=1)
 
         # Ratio K/D
-        kd_ratio = user_stats['kills'] / max(user_stats['deaths'], 1)
-        ratio_label = tk.Label(personal_frame, 
-                             text=f"Ratio K/D: {kd_ratio:.2f}",
-                             bg='#2a2a2a', fg='#00ff00' if kd_ratio >= 1 else '#ff0000',
-                             font=('Arial', 12, 'bold'))
-        ratio_label.pack(pady=10)
+        self.ratio_label = tk.Label(personal_frame, text="Ratio K/D: …",
+                                  bg='#2a2a2a', fg='white',
+                                  font=('Arial', 12, 'bold'))
+        self.ratio_label.pack(pady=10)
 
     def setup_global_stats(self):
         """Configurar pestaña de estadísticas globales"""
         global_frame = tk.Frame(self.notebook, bg='#2a2a2a')
         self.notebook.add(global_frame, text="Global")
 
-        # Aquí se pueden añadir estadísticas globales del servidor
-        tk.Label(global_frame, text="Estadísticas globales próximamente...",
-               bg='#2a2a2a', fg='white', font=('Arial', 12)).pack(expand=True)
+        # Clasificaciones de jugadores y organizaciones
+        self.leaderboards = {}
+        for scope, title in (('player', "🏆 Jugadores"), ('org', "🏴 Organizaciones")):
+            board_frame = tk.LabelFrame(global_frame, text=title, bg='#2a2a2a', fg='white',
+                                      font=('Arial', 10, 'bold'))
+            board_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+            tree = ttk.Treeview(board_frame, columns=('name', 'kills', 'deaths', 'kd', 'vehicles'),
+                              show='headings', height=10)
+            for column, heading, width in (('name', "Nombre", 110), ('kills', "🎯", 45),
+                                           ('deaths', "💀", 45), ('kd', "K/D", 45),
+                                           ('vehicles', "🚁", 45)):
+                tree.heading(column, text=heading)
+                tree.column(column, width=width, stretch=(column == 'name'))
+            tree.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+            self.leaderboards[scope] = tree
+
+    def setup_performance_stats(self):
+        """Configurar pestaña de latencias por etapa"""
+        performance_frame = tk.Frame(self.notebook, bg='#2a2a2a')
+        self.notebook.add(performance_frame, text="Rendimiento")
+
+        self.performance_tree = ttk.Treeview(performance_frame,
+                                             columns=('stage', 'count', 'p50', 'p95', 'p99', 'max'),
+                                             show='headings', height=8)
+        for column, heading, width in (('stage', "Etapa", 150), ('count', "N", 60),
+                                       ('p50', "p50 ms", 65), ('p95', "p95 ms", 65),
+                                       ('p99', "p99 ms", 65), ('max', "máx ms", 65)):
+            self.performance_tree.heading(column, text=heading)
+            self.performance_tree.column(column, width=width, stretch=(column == 'stage'))
+        self.performance_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        tk.Button(performance_frame, text="Actualizar", command=self.show_performance_stats,
+                  bg='#404040', fg='white').pack(pady=5)
+        self.show_performance_stats()
+
+    def show_performance_stats(self):
+        """Rellenar las latencias desde la sesión actual"""
+        monitor = self.parent.engine.performance_monitor
+        self.performance_tree.delete(*self.performance_tree.get_children())
+        for stage, label in monitor.STAGES.items():
+            summary = monitor.histograms[stage].summary()
+            self.performance_tree.insert('', tk.END, values=(
+                label, summary['count'], f"{summary['p50_ms']:.3f}", f"{summary['p95_ms']:.3f}",
+                f"{summary['p99_ms']:.3f}", f"{summary['max_ms']:.3f}"))
+
+    def get_range_start(self):
+        """Inicio (UTC) del periodo seleccionado; None = todo el histórico"""
+        span = dict(self.RANGES).get(self.range_var.get())
+        return datetime.utcnow() - span if span else None
 
     def load_stats(self):
-        """Cargar estadísticas"""
-        pass
+        """Lanzar la carga de estadísticas en segundo plano"""
+        self.load_id += 1
+        self.status_label.config(text="Cargando…")
+        threading.Thread(target=self._load_worker,
+                         args=(self.load_id, self.get_range_start(), self.parent.CURRENT_USER),
+                         daemon=True).start()
+
+    def _load_worker(self, load_id, start, player):
+        """Hilo de carga: consultas con una conexión de solo lectura"""
+        results = None
+        try:
+            conn = self.db.connect_readonly()
+            self.active_conn = conn
+            try:
+                results = {
+                    'personal': self.db.get_range_stats('player', player, start, conn=conn),
+                    'player': self.db.get_leaderboard('player', start, conn=conn),
+                    'org': self.db.get_leaderboard('org', start, conn=conn)
+                }
+            finally:
+                self.active_conn = None
+                conn.close()
+        except Exception as e:
+            logger.error(f"Error cargando estadísticas: {e}")
+
+        if not self.cancelled.is_set():
+            try:
+                self.parent.root.after(0, self._deliver_results, load_id, results)
+            except (RuntimeError, tk.TclError):
+                pass  # La aplicación se está cerrando
+
+    def _deliver_results(self, load_id, results):
+        """Mostrar resultados en el hilo de Tk (descarta cargas obsoletas)"""
+        if self.cancelled.is_set() or load_id != self.load_id:
+            return
+        if results is None:
+            self.status_label.config(text="Error cargando estadísticas")
+            return
+
+        self.show_personal_stats(results['personal'])
+        for scope, tree in self.leaderboards.items():
+            self.show_leaderboard(tree, scope, results[scope])
+        self.status_label.config(text="")
+
+    def on_destroy(self, event):
+        """Cancelar la carga en curso al cerrar la ventana"""
+        if event.widget is self.window:
+            self.cancelled.set()
+            conn = self.active_conn
+            if conn:
+                conn.interrupt()
+
+    def show_personal_stats(self, user_stats):
+        """Mostrar estadísticas personales"""
+        for key, label in self.stat_value_labels.items():
+            label.config(text=str(user_stats[key]))
+
+        kd_ratio = user_stats['kills'] / max(user_stats['deaths'], 1)
+        self.ratio_label.config(text=f"Ratio K/D: {kd_ratio:.2f}",
+                                fg='#00ff00' if kd_ratio >= 1 else '#ff0000')
+
+    def show_leaderboard(self, tree, scope, rows):
+        """Rellenar una clasificación"""
+        tree.delete(*tree.get_children())
+        for row in rows:
+            kd_ratio = row['kills'] / max(row['deaths'], 1)
+            tree.insert('', tk.END, values=(row[scope], row['kills'], row['deaths'],
+                                            f"{kd_ratio:.2f}", row['vehicles_destroyed']))
+
+
+class SearchWindow:
+    """Ventana de búsqueda de eventos guardados"""
+
+    PAGE_SIZE = 50
+
+    def __init__(self, parent, db_manager):
+        self.parent = parent
+        self.db = db_manager
+        self.page = 0
+        self.has_more = False
+        self.load_id = 0
+        self.cancelled = threading.Event()
+        self.active_conn = None
+        self.window = tk.Toplevel(parent.root)
+        self.setup_window()
+        self.setup_ui()
+        self.window.bind('<Destroy>', self.on_destroy)
+
+    def setup_window(self):
+        """Configurar ventana de búsqueda"""
+        self.window.title("Buscar eventos - Star Citizen Log Monitor")
+        self.window.geometry("800x500")
+        self.window.configure(bg='#1a1a1a')
+        self.window.resizable(True, True)
+
+        # Configurar icono
+        try:
+            icon_path = get_resource_path('logoStar.ico')
+            if os.path.exists(icon_path):
+                self.window.iconbitmap(icon_path)
+        except:
+            pass
+
+        self.window.transient(self.parent.root)
+
+    def setup_ui(self):
+        """Configurar interfaz de búsqueda"""
+        main_frame = tk.Frame(self.window, bg='#1a1a1a')
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # Barra de búsqueda
+        search_frame = tk.Frame(main_frame, bg='#1a1a1a')
+        search_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.query_var = tk.StringVar()
+        query_entry = tk.Entry(search_frame, textvariable=self.query_var,
+                             bg='#404040', fg='white', insertbackground='white',
+                             font=('Arial', 11))
+        query_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        query_entry.bind('<Return>', lambda e: self.search())
+        query_entry.focus_set()
+
+        self.order_var = tk.StringVar(value='Relevancia')
+        order_combo = ttk.Combobox(search_frame, textvariable=self.order_var,
+                                 values=['Relevancia', 'Más recientes'], state='readonly', width=14)
+        order_combo.pack(side=tk.LEFT, padx=5)
+        order_combo.bind('<<ComboboxSelected>>', lambda e: self.search())
+
+        tk.Button(search_frame, text="🔍 Buscar", command=self.search,
+                bg='#2d4a5a', fg='white', width=10).pack(side=tk.LEFT)
+
+        # Resultados
+        results_frame = tk.Frame(main_frame, bg='#1a1a1a')
+        results_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.results = ttk.Treeview(results_frame, columns=('time', 'type', 'text'),
+                                  show='headings', selectmode='browse')
+        self.results.heading('time', text='Fecha')
+        self.results.heading('type', text='Tipo')
+        self.results.heading('text', text='Coincidencia')
+        self.results.column('time', width=150, stretch=False)
+        self.results.column('type', width=70, stretch=False)
+        self.results.column('text', width=500)
+        self.results.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        scrollbar = tk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.results.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.results.config(yscrollcommand=scrollbar.set)
+
+        # Paginación
+        nav_frame = tk.Frame(main_frame, bg='#1a1a1a')
+        nav_frame.pack(fill=tk.X, pady=(10, 0))
+
+        self.prev_btn = tk.Button(nav_frame, text="◀ Anterior", command=self.prev_page,
+                                bg='#404040', fg='white', width=12, state=tk.DISABLED)
+        self.prev_btn.pack(side=tk.LEFT)
+
+        self.page_label = tk.Label(nav_frame, text="", bg='#1a1a1a', fg='#cccccc')
+        self.page_label.pack(side=tk.LEFT, expand=True)
+
+        self.next_btn = tk.Button(nav_frame, text="Siguiente ▶", command=self.next_page,
+                                bg='#404040', fg='white', width=12, state=tk.DISABLED)
+        self.next_btn.pack(side=tk.RIGHT)
+
+    def search(self):
+        """Lanzar una búsqueda nueva"""
+        self.page = 0
+        self.load_page()
+
+    def prev_page(self):
+        """Página anterior"""
+        if self.page > 0:
+            self.page -= 1
+            self.load_page()
+
+    def next_page(self):
+        """Página siguiente"""
+        if self.has_more:
+            self.page += 1
+            self.load_page()
+
+    def load_page(self):
+        """Lanzar la carga de la página actual en segundo plano"""
+        query = self.query_var.get().strip()
+        if not query:
+            return
+
+        order = 'recent' if self.order_var.get() == 'Más recientes' else 'rank'
+        self.load_id += 1
+        self.page_label.config(text="Buscando…")
+        threading.Thread(target=self._search_worker,
+                         args=(self.load_id, query, self.page, order),
+                         daemon=True).start()
+
+    def _search_worker(self, load_id, query, page, order):
+        """Hilo de búsqueda: consulta con una conexión de solo lectura"""
+        results = None
+        try:
+            conn = self.db.connect_readonly()
+            self.active_conn = conn
+            try:
+                start = time.perf_counter()
+                hits, has_more = self.db.search_events(query, self.PAGE_SIZE, page * self.PAGE_SIZE,
+                                                       order, conn=conn)
+                results = (page, hits, has_more, (time.perf_counter() - start) * 1000)
+            finally:
+                self.active_conn = None
+                conn.close()
+        except Exception as e:
+            logger.error(f"Error buscando eventos: {e}")
+
+        if not self.cancelled.is_set():
+            try:
+                self.parent.root.after(0, self._deliver_results, load_id, results)
+            except (RuntimeError, tk.TclError):
+                pass  # La aplicación se está cerrando
+
+    def _deliver_results(self, load_id, results):
+        """Mostrar la página en el hilo de Tk (descarta búsquedas obsoletas)"""
+        if self.cancelled.is_set() or load_id != self.load_id:
+            return
+        if results is None:
+            self.page_label.config(text="Error buscando eventos")
+            return
+
+        page, hits, self.has_more, elapsed_ms = results
+        self.results.delete(*self.results.get_children())
+        for hit in hits:
+            self.results.insert('', tk.END, values=(
+                self.format_timestamp(hit['timestamp']),
+                hit['event_type'],
+                hit['snippet']
+            ))
+
+        first = page * self.PAGE_SIZE
+        self.page_label.config(text=f"Resultados {first + 1 if hits else 0}-{first + len(hits)} "
+                                    f"({elapsed_ms:.0f} ms)")
+        self.prev_btn.config(state=tk.NORMAL if page > 0 else tk.DISABLED)
+        self.next_btn.config(state=tk.NORMAL if self.has_more else tk.DISABLED)
+
+    def on_destroy(self, event):
+        """Cancelar la búsqueda en curso al cerrar la ventana"""
+        if event.widget is self.window:
+            self.cancelled.set()
+            conn = self.active_conn
+            if conn:
+                conn.interrupt()
+
+    def format_timestamp(self, value):
+        """Mostrar la fecha UTC guardada en hora local"""
+        try:
+            utc_time = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+            return utc_time.astimezone().strftime("%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return value or ""
 
 
 class ConfigWindow:
+    # Políticas de saturación de la cola de mensajes
+    OVERLOAD_POLICIES = {
+        'drop_oldest': 'Descartar los más antiguos',
+        'drop_newest': 'Descartar los nuevos'
+    }
+
     def __init__(self, parent, config_data):
         self.parent = parent
         self.config = config_data.copy()
@@ -861,6 +2656,23 @@ class ConfigWindow:
                                     bg='#2a2a2a', fg='white', selectcolor='#404040')
         spawns_check.pack(anchor=tk.W, padx=5, pady=2)
 
+        # Jugadores y palabras ocultos
+        muted_players_frame = tk.Frame(filters_frame, bg='#2a2a2a')
+        muted_players_frame.pack(fill=tk.X, padx=5, pady=2)
+        tk.Label(muted_players_frame, text="Ocultar jugadores (separados por comas):", 
+               bg='#2a2a2a', fg='white').pack(side=tk.LEFT)
+        self.muted_players_var = tk.StringVar(value=", ".join(self.config.get('muted_players', [])))
+        tk.Entry(muted_players_frame, textvariable=self.muted_players_var,
+               bg='#404040', fg='white', insertbackground='white').pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=(5, 0))
+
+        muted_keywords_frame = tk.Frame(filters_frame, bg='#2a2a2a')
+        muted_keywords_frame.pack(fill=tk.X, padx=5, pady=2)
+        tk.Label(muted_keywords_frame, text="Ocultar mensajes con (separado por comas):", 
+               bg='#2a2a2a', fg='white').pack(side=tk.LEFT)
+        self.muted_keywords_var = tk.StringVar(value=", ".join(self.config.get('muted_keywords', [])))
+        tk.Entry(muted_keywords_frame, textvariable=self.muted_keywords_var,
+               bg='#404040', fg='white', insertbackground='white').pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=(5, 0))
+
         # Configuración de rendimiento
         performance_frame = tk.LabelFrame(advanced_frame, text="Rendimiento", 
                                         bg='#2a2a2a', fg='white', font=('Arial', 10, 'bold'))
@@ -882,31 +2694,114 @@ class ConfigWindow:
         msg_limit_frame = tk.Frame(performance_frame, bg='#2a2a2a')
         msg_limit_frame.pack(fill=tk.X, padx=5, pady=5)
 
-        tk.Label(msg_limit_frame, text="Límite de mensajes en pantalla:", 
+        tk.Label(msg_limit_frame, text="Mensajes en el historial:", 
                bg='#2a2a2a', fg='white').pack(side=tk.LEFT)
 
-        self.msg_limit_var = tk.IntVar(value=self.config.get('message_limit', 1000))
+        self.msg_limit_var = tk.IntVar(value=self.config.get('message_limit', 100000))
         msg_limit_spin = tk.Spinbox(msg_limit_frame, textvariable=self.msg_limit_var,
-                                  from_=100, to=5000, increment=100, bg='#404040', fg='white', width=8)
+                                  from_=1000, to=200000, increment=1000, bg='#404040', fg='white', width=8)
         msg_limit_spin.pack(side=tk.RIGHT)
 
-        # Configuración de base de datos
-        db_frame = tk.LabelFrame(advanced_frame, text="Base de Datos", 
-                               bg='#2a2a2a', fg='white', font=('Arial', 10, 'bold'))
-        db_frame.pack(fill=tk.X, padx=10, pady=10)
+        # Política ante saturación de la cola de mensajes
+        overload_frame = tk.Frame(performance_frame, bg='#2a2a2a')
+        overload_frame.pack(fill=tk.X, padx=5, pady=5)
 
-        self.save_stats_var = tk.BooleanVar(value=self.config.get('save_stats', True))
-        stats_check = tk.Checkbutton(db_frame, text="Guardar estadísticas en base de datos",
-                                   variable=self.save_stats_var,
-                                   bg='#2a2a2a', fg='white', selectcolor='#404040')
-        stats_check.pack(anchor=tk.W, padx=5, pady=2)
+        tk.Label(overload_frame, text="Si la cola se satura:", 
+               bg='#2a2a2a', fg='white').pack(side=tk.LEFT)
 
-        self.cache_players_var = tk.BooleanVar(value=self.config.get('cache_players', True))
-        cache_check = tk.Checkbutton(db_frame, text="Cachear información de jugadores",
-                                   variable=self.cache_players_var,
-                                   bg='#2a2a2a', fg='white', selectcolor='#404040')
+        self.overload_policy_var = tk.StringVar(value=self.OVERLOAD_POLICIES.get(
+            self.config.get('ui_overload_policy', 'drop_oldest'), self.OVERLOAD_POLICIES['drop_oldest']))
+        overload_combo = ttk.Combobox(overload_frame, textvariable=self.overload_policy_var,
+                                    values=list(self.OVERLOAD_POLICIES.values()),
+                                    state='readonly', width=24)
+        overload_combo.pack(side=tk.RIGHT)
+
+        # Límite de memoria
+        memory_frame = tk.Frame(performance_frame, bg='#2a2a2a')
+        memory_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        tk.Label(memory_frame, text="Límite de memoria (MB, 0 = sin límite):", 
+               bg='#2a2a2a', fg='white').pack(side=tk.LEFT)
+
+        self.memory_budget_var = tk.IntVar(value=self.config.get('memory_budget_mb', 0))
+        memory_spin = tk.Spinbox(memory_frame, textvariable=self.memory_budget_var,
+                               from_=0, to=16384, increment=50, bg='#404040', fg='white', width=8)
+        memory_spin.pack(side=tk.RIGHT)
+
+        # Endpoint local de métricas
+        metrics_frame = tk.Frame(performance_frame, bg='#2a2a2a')
+        metrics_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        self.metrics_enabled_var = tk.BooleanVar(value=self.config.get('metrics_enabled', False))
+        metrics_check = tk.Checkbutton(metrics_frame, text="Servir métricas en http://127.0.0.1:<puerto>/metrics",
+                                     variable=self.metrics_enabled_var,
+                                     bg='#2a2a2a', fg='white', selectcolor='#404040')
+        metrics_check.pack(side=tk.LEFT)
+
+        self.metrics_port_var = tk.IntVar(value=self.config.get('metrics_port', 9464))
+        metrics_port_spin = tk.Spinbox(metrics_frame, textvariable=self.metrics_port_var,
+                                     from_=1024, to=65535, increment=1, bg='#404040', fg='white', width=8)
+        metrics_port_spin.pack(side=tk.RIGHT)
+
+        # Perfilado bajo demanda (no se guarda en la configuración)
+        profiling_frame = tk.Frame(performance_frame, bg='#2a2a2a')
+        profiling_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        self.profile_btn = tk.Button(profiling_frame, command=self.toggle_profiling,
+                                   bg='#404040', fg='white')
+        self.profile_btn.pack(side=tk.LEFT, padx=(0, 5))
+
+        self.snapshot_btn = tk.Button(profiling_frame, text="📸 Instantánea de memoria",
+                                    command=self.take_memory_snapshot,
+                                    bg='#404040', fg='white')
+        self.snapshot_btn.pack(side=tk.LEFT)
+
+        self.profile_status_label = tk.Label(performance_frame, text="", bg='#2a2a2a', fg='#888888',
+                                           wraplength=380, justify=tk.LEFT)
+        self.profile_status_label.pack(anchor=tk.W, padx=5)
+        self.update_profiling_buttons()
+
+        # Configuración de base de datos
+        db_frame = tk.LabelFrame(advanced_frame, text="Base de Datos", 
+                               bg='#2a2a2a', fg='white', font=('Arial', 10, 'bold'))
+        db_frame.pack(fill=tk.X, padx=10, pady=10)
+
+        self.save_stats_var = tk.BooleanVar(value=self.config.get('save_stats', True))
+        stats_check = tk.Checkbutton(db_frame, text="Guardar estadísticas en base de datos",
+                                   variable=self.save_stats_var,
+                                   bg='#2a2a2a', fg='white', selectcolor='#404040')
+        stats_check.pack(anchor=tk.W, padx=5, pady=2)
+
+        self.cache_players_var = tk.BooleanVar(value=self.config.get('cache_players', True))
+        cache_check = tk.Checkbutton(db_frame, text="Cachear información de jugadores",
+                                   variable=self.cache_players_var,
+                                   bg='#2a2a2a', fg='white', selectcolor='#404040')
         cache_check.pack(anchor=tk.W, padx=5, pady=2)
 
+        self.save_events_var = tk.BooleanVar(value=self.config.get('save_events', True))
+        events_check = tk.Checkbutton(db_frame, text="Guardar eventos para búsqueda",
+                                    variable=self.save_events_var,
+                                    bg='#2a2a2a', fg='white', selectcolor='#404040')
+        events_check.pack(anchor=tk.W, padx=5, pady=2)
+
+        # Retención de eventos
+        retention_frame = tk.Frame(db_frame, bg='#2a2a2a')
+        retention_frame.pack(fill=tk.X, padx=5, pady=2)
+
+        tk.Label(retention_frame, text="Conservar eventos (días, 0 = siempre):", 
+               bg='#2a2a2a', fg='white').pack(side=tk.LEFT)
+
+        self.events_retention_var = tk.IntVar(value=self.config.get('events_retention_days', 0))
+        retention_spin = tk.Spinbox(retention_frame, textvariable=self.events_retention_var,
+                                  from_=0, to=3650, increment=1, bg='#404040', fg='white', width=8)
+        retention_spin.pack(side=tk.RIGHT)
+
+        self.archive_events_var = tk.BooleanVar(value=self.config.get('archive_events', False))
+        archive_check = tk.Checkbutton(db_frame, text="Archivar eventos caducados (comprimidos por día)",
+                                     variable=self.archive_events_var,
+                                     bg='#2a2a2a', fg='white', selectcolor='#404040')
+        archive_check.pack(anchor=tk.W, padx=5, pady=2)
+
         # Botones de mantenimiento
         maintenance_frame = tk.Frame(db_frame, bg='#2a2a2a')
         maintenance_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -1022,6 +2917,34 @@ class ConfigWindow:
         """Obtener lista actual de crew"""
         return [self.crew_listbox.get(i) for i in range(self.crew_listbox.size())]
 
+    def split_list(self, text):
+        """Lista a partir de un texto separado por comas"""
+        return [item.strip() for item in text.split(',') if item.strip()]
+
+    def update_profiling_buttons(self):
+        """Reflejar si el perfilado está activo"""
+        active = self.parent.engine.profiler.active
+        self.profile_btn.config(text="⏹ Detener perfilado" if active else "⏺ Iniciar perfilado")
+        self.snapshot_btn.config(state=tk.NORMAL if active else tk.DISABLED)
+
+    def toggle_profiling(self):
+        """Iniciar o detener cProfile y tracemalloc"""
+        profiler = self.parent.engine.profiler
+        if profiler.active:
+            files = profiler.stop()
+            self.profile_status_label.config(
+                text=f"Guardado en {log_directory()}: " + ", ".join(os.path.basename(f) for f in files))
+        else:
+            profiler.start()
+            self.profile_status_label.config(text="Perfilando…")
+        self.update_profiling_buttons()
+
+    def take_memory_snapshot(self):
+        """Instantánea de memoria comparada con la anterior"""
+        path = self.parent.engine.profiler.take_snapshot()
+        if path:
+            self.profile_status_label.config(text=f"Instantánea: {os.path.basename(path)}")
+
     def clear_cache(self):
         """Limpiar cache de jugadores"""
         if messagebox.askyesno("Confirmar", "¿Limpiar cache de jugadores?"):
@@ -1034,7 +2957,7 @@ class ConfigWindow:
                         conn.commit()
 
                 # Limpiar cache en memoria
-                self.parent.player_info_cache.clear()
+                self.parent.engine.player_info_cache.clear()
                 messagebox.showinfo("Completado", "Cache limpiado correctamente")
             except Exception as e:
                 messagebox.showerror("Error", f"Error limpiando cache: {e}")
@@ -1111,10 +3034,19 @@ class ConfigWindow:
             'show_missiles': self.show_missiles_var.get(),
             'show_vehicles': self.show_vehicles_var.get(),
             'show_spawns': self.show_spawns_var.get(),
+            'muted_players': self.split_list(self.muted_players_var.get()),
+            'muted_keywords': self.split_list(self.muted_keywords_var.get()),
             'update_interval': self.update_interval_var.get(),
             'message_limit': self.msg_limit_var.get(),
+            'ui_overload_policy': self.get_overload_policy(),
+            'memory_budget_mb': self.memory_budget_var.get(),
+            'metrics_enabled': self.metrics_enabled_var.get(),
+            'metrics_port': self.metrics_port_var.get(),
             'save_stats': self.save_stats_var.get(),
-            'cache_players': self.cache_players_var.get()
+            'cache_players': self.cache_players_var.get(),
+            'save_events': self.save_events_var.get(),
+            'events_retention_days': self.events_retention_var.get(),
+            'archive_events': self.archive_events_var.get()
         })
 
     def restore_defaults(self):
@@ -1141,10 +3073,19 @@ class ConfigWindow:
                 'show_missiles': True,
                 'show_vehicles': True,
                 'show_spawns': True,
+                'muted_players': [],
+                'muted_keywords': [],
                 'update_interval': 500,
-                'message_limit': 1000,
+                'message_limit': 100000,
+                'ui_overload_policy': 'drop_oldest',
+                'memory_budget_mb': 0,
+                'metrics_enabled': False,
+                'metrics_port': 9464,
                 'save_stats': True,
-                'cache_players': True
+                'cache_players': True,
+                'save_events': True,
+                'events_retention_days': 0,
+                'archive_events': False
             }
 
             # Actualizar UI
@@ -1163,10 +3104,19 @@ class ConfigWindow:
             self.show_missiles_var.set(defaults['show_missiles'])
             self.show_vehicles_var.set(defaults['show_vehicles'])
             self.show_spawns_var.set(defaults['show_spawns'])
+            self.muted_players_var.set(", ".join(defaults['muted_players']))
+            self.muted_keywords_var.set(", ".join(defaults['muted_keywords']))
             self.update_interval_var.set(defaults['update_interval'])
             self.msg_limit_var.set(defaults['message_limit'])
+            self.overload_policy_var.set(self.OVERLOAD_POLICIES[defaults['ui_overload_policy']])
+            self.memory_budget_var.set(defaults['memory_budget_mb'])
+            self.metrics_enabled_var.set(defaults['metrics_enabled'])
+            self.metrics_port_var.set(defaults['metrics_port'])
             self.save_stats_var.set(defaults['save_stats'])
             self.cache_players_var.set(defaults['cache_players'])
+            self.save_events_var.set(defaults['save_events'])
+            self.events_retention_var.set(defaults['events_retention_days'])
+            self.archive_events_var.set(defaults['archive_events'])
 
             # Limpiar listas
             self.crew_listbox.delete(0, tk.END)
@@ -1175,12 +3125,767 @@ class ConfigWindow:
             self.orgs_blacklist.delete(0, tk.END)
             self.orgs_whitelist.delete(0, tk.END)
 
+    def get_overload_policy(self):
+        """Clave de la política de saturación elegida en el combo"""
+        for policy, label in self.OVERLOAD_POLICIES.items():
+            if label == self.overload_policy_var.get():
+                return policy
+        return 'drop_oldest'
+
     def cancel(self):
         """Cancelar y cerrar ventana"""
         self.window.destroy()
 
+class FilterEngine:
+    """Filtro de mensajes y clasificación de jugadores compilados desde la configuración"""
+
+    # Bits por tipo de mensaje y su opción de configuración
+    TYPE_BITS = {'death': 1, 'missile': 2, 'vehicle': 4, 'spawn': 8,
+                 'chat': 16, 'system': 32, 'trade': 64}
+    TYPE_TOGGLES = {'show_deaths': 'death', 'show_missiles': 'missile',
+                    'show_vehicles': 'vehicle', 'show_spawns': 'spawn'}
+    CHANNEL_BITS = {'Combat': 1, 'System': 2, 'Global': 4, 'Local': 8,
+                    'Party': 16, 'Organization': 32}
+    OTHER_BIT = 1 << 15  # tipos y canales desconocidos, siempre visibles
+
+    def __init__(self, config: Dict):
+        self.compile(config)
+
+    def compile(self, config: Dict):
+        """Recompilar a partir de la configuración (solo al aplicarla)"""
+        type_mask = sum(self.TYPE_BITS.values()) | self.OTHER_BIT
+        for option, message_type in self.TYPE_TOGGLES.items():
+            if not config.get(option, True):
+                type_mask &= ~self.TYPE_BITS[message_type]
+
+        channel_mask = sum(self.CHANNEL_BITS.values()) | self.OTHER_BIT
+        for channel in config.get('hidden_channels', []):
+            channel_mask &= ~self.CHANNEL_BITS.get(channel, 0)
+
+        keywords = [k for k in config.get('muted_keywords', []) if k]
+        # Los más largos primero para que la alternancia no se quede corta
+        keyword_search = None
+        if keywords:
+            pattern = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            keyword_search = re.compile(pattern, re.IGNORECASE).search
+
+        muted_players = frozenset(p.casefold() for p in config.get('muted_players', []))
+        type_bits, channel_bits, other_bit = self.TYPE_BITS, self.CHANNEL_BITS, self.OTHER_BIT
+
+        def accepts(message_type, channel, player_name, text):
+            if not type_mask & type_bits.get(message_type, other_bit):
+                return False
+            if not channel_mask & channel_bits.get(channel, other_bit):
+                return False
+            if player_name and muted_players and player_name.casefold() in muted_players:
+                return False
+            if keyword_search is not None and keyword_search(text):
+                return False
+            return True
+
+        self.accepts = accepts
+
+        # Conjuntos para clasificar jugadores sin recorrer listas
+        self.current_user = config.get('current_user', '').casefold()
+        self.enemy_players = frozenset(p.casefold() for p in config.get('players_blacklist', []))
+        self.enemy_orgs = frozenset(o.casefold() for o in config.get('orgs_blacklist', []))
+        self.friendly_players = frozenset(p.casefold() for p in config.get('players_whitelist', []) +
+                                          config.get('crew_nicks', []))
+        self.friendly_orgs = frozenset(o.casefold() for o in config.get('orgs_whitelist', []))
+
+    def classify(self, player_handle: str, org: str = "") -> str:
+        """Tag de color de un jugador: user, enemy, friendly o neutral"""
+        handle = player_handle.casefold()
+        org = org.casefold()
+        if handle == self.current_user:
+            return "user"
+        if player_handle == 'unknown':
+            return "neutral"
+        if handle in self.enemy_players or (org and org in self.enemy_orgs):
+            return "enemy"
+        if handle in self.friendly_players or (org and org in self.friendly_orgs):
+            return "friendly"
+        return "neutral"
+
+
+class LogEngine:
+    """Núcleo sin interfaz: lectura del log, análisis, enriquecimiento y estadísticas"""
+
+    def __init__(self, config: Dict, db_manager: Optional[DatabaseManager] = None):
+        self.config = config
+        self.db_manager = db_manager
+        self.subscribers = []
+        self.player_info_cache = {}
+        self.deduplicator = EventDeduplicator(config.get('dedup_window_s', 600),
+                                              config.get('dedup_capacity', 20000),
+                                              config.get('dedup_bloom', False))
+        self.filter_engine = FilterEngine(config)
+        self.performance_monitor = PerformanceMonitor()
+        self.profiler = SessionProfiler()
+        self.memory_budget = MemoryBudget(self.performance_monitor, config.get('memory_budget_mb', 0))
+        self.memory_budget.add_shedder('caches', self.shed_caches)
+        self.memory_budget.add_shedder('dedup', self.shed_dedup)
+        if db_manager:
+            db_manager.performance_monitor = self.performance_monitor
+        self.monitoring = False
+        self.monitor_thread = None
+        self.last_file_position = 0
+        self.persist = True  # False durante una reproducción que no debe tocar la base de datos
+        self.LOG_FILENAME = config.get('log_filename', '')
+        self.apply_config()
+
+    def apply_config(self):
+        """Releer las opciones del motor tras un cambio de configuración"""
+        self.CURRENT_USER = self.config.get('current_user', 'Por defecto')
+        log_filename = self.config.get('log_filename', '')
+        if log_filename != self.LOG_FILENAME:
+            # Otro archivo de log: su historial no es comparable con el anterior
+            self.deduplicator.reset()
+        self.LOG_FILENAME = log_filename
+        self.filter_engine.compile(self.config)
+        self.memory_budget.budget_mb = self.config.get('memory_budget_mb', 0)
+
+    def shed_caches(self):
+        """Primer paso ante falta de memoria: quedarse con la mitad más reciente de la cache de jugadores"""
+        cache = self.player_info_cache
+        if len(cache) <= 100:
+            return None
+        keep = len(cache) // 2
+        # Se sustituye el diccionario entero: el hilo lector nunca ve uno a medias
+        self.player_info_cache = dict(list(cache.items())[-keep:])
+        return f"cache de jugadores {len(cache)}→{keep}"
+
+    def shed_dedup(self):
+        """Reducir a la mitad las huellas recordadas por el deduplicador"""
+        if len(self.deduplicator.recent) <= 1000:
+            return None
+        before, keep = self.deduplicator.shrink()
+        return f"huellas de duplicados {before}→{keep}"
+
+    def subscribe(self, callback):
+        """Registrar un receptor de EngineEvent (se llama desde el hilo lector)"""
+        self.subscribers.append(callback)
+
+    def emit(self, event):
+        for callback in self.subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Error entregando evento: {e}")
+
+    def start(self, from_end=True, source=None):
+        """Empezar a seguir el log (o a leer de source, p. ej. un ReplaySource) en un hilo propio"""
+        if self.monitoring:
+            return
+        if source is not None:
+            target, args = source.run, (self,)
+        else:
+            self.last_file_position = 0
+            if from_end:
+                try:
+                    self.last_file_position = os.path.getsize(self.LOG_FILENAME)
+                except OSError as e:
+                    logger.error(f"Error obteniendo posición del archivo: {e}")
+            target, args = self.monitor_log, ()
+
+        self.monitoring = True
+        self.monitor_thread = threading.Thread(target=target, args=args, daemon=True)
+        self.monitor_thread.start()
+
+    def stop(self):
+        self.monitoring = False
+
+    def collect_metrics(self):
+        """Métricas del motor para MetricsServer (se llama desde el hilo del servidor)"""
+        monitor = self.performance_monitor
+        lookups = {name[len('player_lookups_'):]: monitor.counters[name]
+                   for name in monitor.COUNTERS if name.startswith('player_lookups_')}
+        lookups_total = sum(lookups.values())
+
+        metrics = [
+            ('sc_monitor_uptime_seconds', 'gauge', "Segundos desde el arranque",
+             [('', {}, round(time.time() - monitor.start_time, 3))]),
+            ('sc_monitor_monitoring', 'gauge', "1 si se está leyendo el log",
+             [('', {}, int(self.monitoring))]),
+            ('sc_monitor_lines_total', 'counter', "Líneas leídas de Game.log",
+             [('', {}, monitor.lines_total)]),
+            ('sc_monitor_lines_per_second', 'gauge', "Líneas por segundo en el último minuto",
+             [('', {}, round(monitor.lines_per_second(), 3))]),
+            ('sc_monitor_events_total', 'counter', "Eventos extraídos del log",
+             [('', {}, monitor.message_count)]),
+            ('sc_monitor_player_lookups_total', 'counter', "Consultas de información de jugador por origen",
+             [('', {'source': source}, count) for source, count in lookups.items()]),
+            ('sc_monitor_player_cache_hit_ratio', 'gauge', "Fracción de consultas de jugador sin ir a la web",
+             [('', {}, round((lookups_total - lookups['network']) / lookups_total, 4) if lookups_total else 0)]),
+            ('sc_monitor_player_cache_entries', 'gauge', "Jugadores en la cache de memoria",
+             [('', {}, len(self.player_info_cache))]),
+            ('sc_monitor_rsi_errors_total', 'counter', monitor.COUNTERS['rsi_errors'],
+             [('', {}, monitor.counters['rsi_errors'])]),
+            ('sc_monitor_memory_rss_bytes', 'gauge', "Memoria residente del proceso",
+             [('', {}, int(monitor._get_memory_usage() * 1024 * 1024))]),
+            ('sc_monitor_memory_budget_bytes', 'gauge', "Límite de memoria configurado (0 = sin límite)",
+             [('', {}, int(self.memory_budget.budget_mb * 1024 * 1024))]),
+            ('sc_monitor_memory_shed_total', 'counter', "Veces que se ha liberado memoria por superar el límite",
+             [('', {}, self.memory_budget.shed_count)]),
+        ]
+
+        stage_samples = []
+        for stage, histogram in monitor.histograms.items():
+            for quantile in (0.5, 0.95, 0.99):
+                stage_samples.append(('', {'stage': stage, 'quantile': str(quantile)},
+                                      histogram.percentile(quantile)))
+            stage_samples.append(('_sum', {'stage': stage}, round(histogram.total, 6)))
+            stage_samples.append(('_count', {'stage': stage}, histogram.count))
+        metrics.append(('sc_monitor_stage_seconds', 'summary',
+                        "Duración de cada etapa del pipeline (rsi_request y db_write incluidas)", stage_samples))
+
+        if self.db_manager:
+            metrics.append(('sc_monitor_db_pending', 'gauge', "Escrituras pendientes del próximo volcado a la BD",
+                            [('', {'kind': 'events'}, len(self.db_manager.pending_events)),
+                             ('', {'kind': 'stats'}, len(self.db_manager.pending_stats))]))
+        return metrics
+
+    def monitor_log(self):
+        """Seguir el archivo de log y procesar las líneas nuevas hasta stop()"""
+        while self.monitoring:
+            self.profiler.checkpoint('reader')
+            try:
+                self.read_new_lines()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error leyendo el archivo de log: {e}")
+
+            time.sleep(0.5)
+        self.profiler.release('reader')
+
+    def read_new_lines(self):
+        """Procesar lo escrito en el log desde la última lectura"""
+        start = time.perf_counter()
+        # El juego crea un Game.log nuevo en cada sesión
+        if os.path.getsize(self.LOG_FILENAME) < self.last_file_position:
+            self.last_file_position = 0
+
+        with open(self.LOG_FILENAME, 'r', encoding="latin1") as f:
+            f.seek(self.last_file_position)
+            lines = f.readlines()
+            self.last_file_position = f.tell()
+
+        # No procesar una línea a medio escribir
+        if lines and not lines[-1].endswith('\n'):
+            self.last_file_position -= len(lines.pop())
+        if lines:
+            self.performance_monitor.record('read', time.perf_counter() - start)
+            self.performance_monitor.record_lines(len(lines))
+
+        for line in lines:
+            self.process_log_line(line)
+        return len(lines)
+
+    def process_log_line(self, line) -> Optional[EngineEvent]:
+        """Process a single log line and extract relevant information"""
+        try:
+            start = time.perf_counter()
+            message_data = parse_log_line(line)
+            self.performance_monitor.record('parse', time.perf_counter() - start)
+
+            if message_data:
+                # Una línea releída (reanudación, rotación) no se procesa dos veces
+                participants = (message_data.player_name, *message_data.details.values()) \
+                    if message_data.details else (message_data.player_name, message_data.message)
+                if self.deduplicator.seen(message_data.timestamp, message_data.message_type, participants):
+                    return None
+
+                message_data.raw_line = line.strip()
+                return self.process_message(message_data)
+
+        except Exception as e:
+            logger.error(f"Error procesando línea del log: {e}")
+        return None
+
+    def process_message(self, message_data):
+        """Formatear un mensaje extraído del log, registrar sus estadísticas y publicarlo"""
+        self.performance_monitor.record_message()
+        details = message_data.details
+        kind = None
+
+        if message_data.message_type == 'death' and details:
+            victim, killer = details['victim'], details['killer']
+            victim_tag, victim_text = self.get_actor_info(victim, details['victim_id'])
+            if killer == victim or killer == 'unknown':
+                text = f"💀 {victim_text} murió ({details['damage']})"
+                tags = [victim_tag]
+            else:
+                killer_tag, killer_text = self.get_actor_info(killer, details['killer_id'])
+                direction = ""
+                if details.get('x') is not None:
+                    direction = self.get_direction_info(details['x'], details['y'], details['z'])
+                text = f"🎯 {killer_text} mató a {victim_text} con {details['weapon']}{direction}"
+                tags = [killer_tag, victim_tag]
+            if self.is_npc(victim, details['victim_id']):
+                kind = 'npc_death'
+            participants = [killer, victim]
+
+        elif message_data.message_type == 'vehicle' and details:
+            attacker = details['attacker']
+            attacker_tag, attacker_text = self.get_actor_info(attacker, details['attacker_id'])
+            text = (f"🚁 {details['vehicle']} ({details['driver']}) destruido por {attacker_text} "
+                    f"[nivel {details['from_level']}→{details['to_level']}]")
+            tags = [attacker_tag]
+            participants = [attacker, details['driver'], details['vehicle']]
+
+        elif message_data.message_type == 'spawn':
+            player = details['player']
+            text = f"🛬 {player} reapareció ({details['spawnpoint']})"
+            tags = ["user" if player == self.CURRENT_USER else "neutral"]
+            participants = [player]
+            kind = 'spawn'
+
+        else:
+            prefix = f"[{message_data.channel}] " if message_data.message_type == 'chat' else ""
+            text = f"{prefix}{message_data.player_name}: {message_data.message}"
+            tags = ["info" if message_data.message_type == 'system' else "neutral"]
+            participants = [message_data.player_name]
+
+        for player, stat_type in combat_stats(message_data):
+            self.record_stat(message_data.timestamp, player, stat_type)
+
+        if self.db_manager and self.persist and self.config.get('save_events', True):
+            self.db_manager.save_event(LogEvent(
+                timestamp=message_data.timestamp,
+                event_type=message_data.message_type,
+                message=text,
+                participants=participants,
+                raw_line=message_data.raw_line
+            ))
+
+        # Lo filtrado no se muestra, pero cuenta en estadísticas y búsqueda
+        event = EngineEvent(
+            timestamp=message_data.timestamp,
+            event_type=message_data.message_type,
+            channel=message_data.channel,
+            player_name=message_data.player_name,
+            text=text,
+            tag=self.pick_message_tag(tags),
+            participants=participants,
+            details=details,
+            kind=kind,
+            visible=self.filter_engine.accepts(message_data.message_type, message_data.channel,
+                                               message_data.player_name, text),
+            raw_line=message_data.raw_line
+        )
+        self.emit(event)
+        return event
+
+    def pick_message_tag(self, tags):
+        """Elegir el color más relevante entre los participantes"""
+        for tag in ("user", "enemy", "friendly"):
+            if tag in tags:
+                return tag
+        return "neutral"
+
+    def record_stat(self, timestamp, player, stat_type):
+        """Registrar una estadística si está habilitado"""
+        if self.db_manager and self.persist and self.config.get('save_stats', True):
+            self.db_manager.update_stats(timestamp, player, stat_type, org=self.get_player_org(player))
+
+    def get_player_org(self, player_handle):
+        """Organización principal conocida del jugador (cache en memoria)"""
+        player_info = self.player_info_cache.get(player_handle)
+        return player_info.get("mainOrg", "") if player_info else ""
+
+    def is_npc(self, actor_name, actor_id=None):
+        """Determinar si un actor es un PNJ"""
+        return is_npc_actor(actor_name, actor_id)
+
+    def get_actor_info(self, actor_name, actor_id=None):
+        """Obtener información mejorada del actor como (tag, texto)"""
+        if actor_id and actor_id in actor_name:
+            # Es un PNJ, limpiar nombre
+            return ("neutral", actor_name[:-(len(actor_id)+1)])
+        else:
+            # Verificar si es un PNJ con patrón
+            match = re.search(r"(.+)_\d{6,14}", actor_name)
+            if match:
+                return ("neutral", match.group(1))
+            else:
+                # Es un jugador real, obtener info web si está habilitado
+                return self.get_web_info(actor_name)
+
+    def get_web_info(self, player_handle):
+        """Obtener información web del jugador"""
+        if not self.config.get('web_info', True):
+            return self.format_player_info(player_handle, {})
+
+        start = time.perf_counter()
+        stage = 'enrich_cache'
+
+        # Verificar cache en memoria primero (reinsertar lo mantiene entre los recientes)
+        if player_handle in self.player_info_cache:
+            player_info = self.player_info_cache.pop(player_handle)
+            self.player_info_cache[player_handle] = player_info
+            self.performance_monitor.count('player_lookups_memory')
+        else:
+            # Verificar cache en base de datos
+            if self.db_manager and self.config.get('cache_players', True):
+                player_info = self.db_manager.get_player_info(player_handle)
+                if player_info:
+                    self.performance_monitor.count('player_lookups_db')
+                    # Convertir a dict para compatibilidad
+                    player_info = {
+                        "mainOrgName": player_info.main_org_name,
+                        "mainOrg": player_info.main_org,
+                        "orgRang": player_info.org_rank,
+                        "enlisted": player_info.enlisted,
+                        "location": player_info.location,
+                        "fluency": player_info.fluency
+                    }
+                else:
+                    # Obtener información de la web
+                    stage = 'enrich_network'
+                    self.performance_monitor.count('player_lookups_network')
+                    player_info = self.fetch_player_info(player_handle)
+
+                    # Guardar en base de datos
+                    if self.db_manager and player_info:
+                        db_player_info = PlayerInfo(
+                            handle=player_handle,
+                            main_org=player_info.get("mainOrg", ""),
+                            main_org_name=player_info.get("mainOrgName", ""),
+                            org_rank=player_info.get("orgRang", ""),
+                            enlisted=player_info.get("enlisted", ""),
+                            location=player_info.get("location", ""),
+                            fluency=player_info.get("fluency", "")
+                        )
+                        self.db_manager.save_player_info(db_player_info)
+            else:
+                # Obtener información de la web directamente
+                stage = 'enrich_network'
+                self.performance_monitor.count('player_lookups_network')
+                player_info = self.fetch_player_info(player_handle)
+
+            # Guardar en cache de memoria
+            self.player_info_cache[player_handle] = player_info
+
+        self.performance_monitor.record(stage, time.perf_counter() - start)
+
+        # Determinar color y información adicional
+        return self.format_player_info(player_handle, player_info)
+
+    def fetch_player_info(self, player_handle):
+        """Obtener información del jugador desde RSI con timeout mejorado"""
+        player_info = {
+            "mainOrgName": "",
+            "mainOrg": "",
+            "orgRang": "",
+            "enlisted": "",
+            "location": "",
+            "fluency": ""
+        }
+
+        # Solo se carga con la información web activada
+        import requests
+
+        try:
+            url = f"https://robertsspaceindustries.com/en/citizens/{player_handle}"
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            }
+            start = time.perf_counter()
+            try:
+                resp = requests.get(url, timeout=10, headers=headers)
+            finally:
+                self.performance_monitor.record('rsi_request', time.perf_counter() - start)
+
+            if resp.status_code != 200:
+                self.performance_monitor.count('rsi_errors')
+            else:
+                text = resp.text
+
+                # Extraer información de la organización con patrones mejorados
+                patterns = {
+                    'mainOrg': r'(?s)<span class="label data\d+">Spectrum Identification \(SID\)</span>.+<strong class="value data\d+">(\w+)</strong>',
+                    'mainOrgName': r'(?s)<a href="\/orgs\/[\w\d]+" class="value data\d+" style="background-position:-\d+px center">\s*([\w\d\s]+)\s*</a>',
+                    'enlisted': r'(?s)<span class="label">Enlisted</span>[\s]+<strong class="value">\s*([\w\d\s]+, \d{4})\s*</strong>',
+                    'fluency': r'(?s)<span class="label">Fluency</span>[\s]+<strong class="value">\s*([\w\d\s,]+[\w\d])\s*</strong>'
+                }
+
+                for key, pattern in patterns.items():
+                    match = re.search(pattern, text)
+                    if match:
+                        value = match.group(1).strip()
+                        if key == 'fluency':
+                            value = value.replace(' ', '')
+                        player_info[key] = value
+
+        except requests.exceptions.Timeout:
+            self.performance_monitor.count('rsi_errors')
+            logger.warning(f"Timeout obteniendo info de {player_handle}")
+        except requests.exceptions.RequestException as e:
+            self.performance_monitor.count('rsi_errors')
+            logger.warning(f"Error de red obteniendo info de {player_handle}: {e}")
+        except Exception as e:
+            logger.error(f"Error inesperado obteniendo info de {player_handle}: {e}")
+
+        return player_info
+
+    def format_player_info(self, player_handle, player_info):
+        """Formatear información del jugador con colores"""
+        # Información adicional
+        info_parts = []
+        if player_info.get("mainOrg"):
+            org_info = player_info['mainOrg']
+            if player_info.get("mainOrgName"):
+                org_info += f"-{player_info['mainOrgName']}"
+            info_parts.append(org_info)
+
+        if player_info.get("enlisted"):
+            info_parts.append(player_info["enlisted"])
+        if player_info.get("fluency"):
+            info_parts.append(player_info["fluency"])
+
+        info_text = f" [{' | '.join(info_parts)}]" if info_parts else ""
+
+        # Determinar tipo de jugador
+        tag = self.filter_engine.classify(player_handle, player_info.get("mainOrg", ""))
+        return (tag, f"{player_handle}{info_text}")
+
+    def get_direction_info(self, x, y, z):
+        """Obtener información de dirección del disparo mejorada"""
+        if not self.config.get('show_direction', True):
+            return ""
+
+        try:
+            angle = math.degrees(math.atan2(float(x), float(y)))
+            if angle < 0:
+                angle = angle + 360
+
+            # Convertir ángulo a dirección cardinal
+            directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+            direction_index = int((angle + 22.5) / 45) % 8
+            cardinal = directions[direction_index]
+
+            return f" [{round(angle, 1)}° {cardinal}]"
+        except (ValueError, TypeError):
+            return " [?°]"
+
+
+class ReplaySource:
+    """Fuente que reproduce un Game.log grabado en lugar de seguir el archivo en vivo"""
+
+    def __init__(self, path: str, speed: float = 1.0, persist: bool = False):
+        self.path = path
+        self.speed = speed  # factor sobre el tiempo original; 0 = máxima velocidad
+        self.persist = persist
+        self.on_finished = None
+        self.reset()
+
+    def reset(self):
+        self.lines = 0
+        self.events = 0
+        self.latencies = LatencyHistogram()  # entre el momento previsto de cada evento y su entrega
+        self.elapsed = 0.0
+        self.log_span = 0.0
+
+    @property
+    def speed_label(self) -> str:
+        return f"{self.speed:g}x" if self.speed > 0 else "máx"
+
+    def run(self, engine):
+        """Pasar el archivo por el motor hasta el final o hasta engine.stop()"""
+        self.reset()
+        persist, engine.persist = engine.persist, self.persist
+        engine.deduplicator.reset()
+        first_log_time = None
+        reported = 0  # líneas ya contadas en PerformanceMonitor
+        start = time.perf_counter()
+        try:
+            with open(self.path, 'r', encoding="latin1") as f:
+                for line in f:
+                    if not engine.monitoring:
+                        break
+
+                    due = time.perf_counter()
+                    timestamp_match = LOG_TIMESTAMP_RE.search(line) if self.speed > 0 else None
+                    if timestamp_match:
+                        log_time = datetime.fromisoformat(timestamp_match.group(1).replace('Z', '+00:00'))
+                        if first_log_time is None:
+                            first_log_time = log_time
+                        offset = (log_time - first_log_time).total_seconds()
+                        self.log_span = max(self.log_span, offset)
+
+                        # Respetar la separación original entre líneas, escalada por la velocidad
+                        due = start + offset / self.speed
+                        delay = due - time.perf_counter()
+                        while delay > 0 and engine.monitoring:
+                            time.sleep(min(delay, 0.5))
+                            delay = due - time.perf_counter()
+
+                    if not self.lines & 1023:
+                        engine.profiler.checkpoint('reader')
+                        engine.performance_monitor.record_lines(self.lines - reported)
+                        reported = self.lines
+                    event = engine.process_log_line(line)
+                    self.lines += 1
+                    if event is not None:
+                        self.events += 1
+                        self.latencies.record(time.perf_counter() - due)
+        except OSError as e:
+            logger.error(f"Error leyendo el log grabado: {e}")
+        finally:
+            self.elapsed = time.perf_counter() - start
+            engine.profiler.release('reader')
+            engine.performance_monitor.record_lines(self.lines - reported)
+            engine.persist = persist
+            engine.monitoring = False
+            if self.on_finished:
+                self.on_finished(self)
+
+    def percentile(self, fraction: float) -> float:
+        """Latencia en ms del percentil indicado (0-1)"""
+        return self.latencies.percentile(fraction) * 1000
+
+    def summary(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return (f"Reproducción {self.speed_label}: {self.lines} líneas y {self.events} eventos en {self.elapsed:.2f} s "
+                f"({self.lines / elapsed:.0f} líneas/s, {self.events / elapsed:.0f} eventos/s); "
+                f"latencia p50 {self.percentile(0.5):.2f} ms, p95 {self.percentile(0.95):.2f} ms, "
+                f"p99 {self.percentile(0.99):.2f} ms, máx {self.percentile(1.0):.2f} ms")
+
+
+# Configuración predeterminada, compartida por la interfaz y el modo sin interfaz
+CONFIG_FILE = "sc_monitor_config.json"
+
+DEFAULT_CONFIG = {
+    'current_user': 'Por defecto',
+    'log_filename': r'C:\Program Files\Roberts Space Industries\StarCitizen\LIVE\Game.log',
+    'crew_nicks': [],
+    'players_blacklist': [],
+    'players_whitelist': [],
+    'orgs_blacklist': [],
+    'orgs_whitelist': [],
+    'auto_start': False,
+    'save_position': True,
+    'show_direction': True,
+    'web_info': True,
+    'notifications': True,
+    'transparency': 0.9,
+    'font_size': 10,
+    'theme': 'dark',
+    'overlay_position': 'top',
+    'window_geometry': '900x250+100+100',
+    'overlay_geometry': '800x120+100+10',
+    'overlay_fps': 10,
+    'show_deaths': True,
+    'show_missiles': True,
+    'show_vehicles': True,
+    'show_spawns': True,
+    'muted_players': [],
+    'muted_keywords': [],
+    'hidden_channels': [],
+    'dedup_window_s': 600,
+    'dedup_capacity': 20000,
+    'dedup_bloom': False,
+    'update_interval': 500,
+    'ui_frame_budget_ms': 15,
+    'ui_queue_size': 5000,
+    'ui_overload_policy': 'drop_oldest',
+    'ui_idle_fallback_ms': 5000,
+    'message_limit': 100000,
+    'save_stats': True,
+    'cache_players': True,
+    'save_events': True,
+    'stats_flush_interval': 30,
+    'events_retention_days': 0,
+    'stats_retention_days': 365,
+    'players_retention_days': 30,
+    'archive_events': False,
+    'maintenance_interval': 3600,
+    'metrics_enabled': False,
+    'metrics_port': 9464,
+    'memory_budget_mb': 0,
+    'memory_check_interval': 30
+}
+
+
+def load_config_file(path=CONFIG_FILE) -> Dict:
+    """Configuración predeterminada actualizada con la guardada en disco"""
+    config = json.loads(json.dumps(DEFAULT_CONFIG))  # copia profunda
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                config.update(json.load(f))
+    except Exception as e:
+        logger.error(f"Error cargando configuración: {e}")
+    return config
+
+
+class ConfigWriter:
+    """Guardado de la configuración en segundo plano, atómico y agrupado"""
+
+    def __init__(self, path, delay=0.5):
+        self.path = path
+        self.delay = delay  # espera para agrupar guardados seguidos
+        self.lock = threading.Lock()
+        self.pending = None
+        self.wake = threading.Event()
+        self.closing = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def save(self, config):
+        """Programar el guardado; solo se escribe la última versión"""
+        data = json.dumps(config, indent=2, ensure_ascii=False)
+        with self.lock:
+            self.pending = data
+        self.wake.set()
+
+    def _run(self):
+        while True:
+            self.wake.wait()
+            if not self.closing:
+                time.sleep(self.delay)
+            self.wake.clear()
+
+            with self.lock:
+                data, self.pending = self.pending, None
+            if data is not None:
+                self._write(data)
+            if self.closing:
+                # Un save() durante la última escritura también tiene que llegar a disco
+                with self.lock:
+                    if self.pending is None:
+                        return
+
+    def _write(self, data):
+        """Escribir en un temporal y renombrar para no dejar el JSON a medias"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            logger.info("Configuración guardada correctamente")
+        except Exception as e:
+            logger.error(f"Error guardando configuración: {e}")
+
+    def close(self):
+        """Escribir lo pendiente y terminar el hilo"""
+        self.closing = True
+        self.wake.set()
+        self.thread.join(timeout=5)
+
+
 class StarCitizenLogMonitor:
-    def __init__(self):
+    # Tags de color del área de mensajes
+    MESSAGE_TAGS = {"info", "user", "crew", "enemy", "friendly", "neutral", "warning", "success"}
+
+    def __init__(self, replay: Optional[ReplaySource] = None, profile: bool = False,
+                 metrics_port: Optional[int] = None):
+        self.replay = replay
+        self.metrics_port = metrics_port  # --metrics-port: activa el endpoint sin tocar la configuración
+        self.metrics_server = None
         self.root = tk.Tk()
         self.load_config()
         self.setup_database()
@@ -1189,45 +3894,129 @@ class StarCitizenLogMonitor:
         self.setup_ui()
         self.setup_monitoring()
         self.setup_notifications()
+        self.update_metrics_server()
+        self.setup_memory_budget()
 
-        # Auto-start si está configurado
-        if self.config.get('auto_start', False):
+        if profile:
+            self.engine.profiler.start()
+
+        # Auto-start si está configurado (una reproducción empieza siempre)
+        if self.replay or self.config.get('auto_start', False):
             self.root.after(1000, self.start_monitoring)
 
     def save_config(self):
-        try:
-            with open("sc_monitor_config.json", "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-            logger.info("Configuración guardada correctamente")
-        except Exception as e:
-            logger.error(f"Error guardando configuración: {e}")
+        """Guardar la configuración (se escribe en segundo plano)"""
+        self.config_writer.save(self.config)
 
     def setup_database(self):
         """Configurar base de datos"""
         try:
             self.db_manager = DatabaseManager()
+            self.apply_retention_config()
+            self.db_manager.start_auto_flush(self.config.get('stats_flush_interval', 30))
         except Exception as e:
             logger.error(f"Error configurando base de datos: {e}")
             self.db_manager = None
 
+    def apply_retention_config(self):
+        """Pasar la configuración de retención al gestor de base de datos"""
+        archive_dir = None
+        if self.config.get('archive_events', False):
+            archive_dir = os.path.join(os.path.dirname(os.path.abspath(self.db_manager.db_path)), 'archive')
+        self.db_manager.set_retention(
+            events_days=self.config.get('events_retention_days', 0),
+            stats_days=self.config.get('stats_retention_days', 365),
+            players_days=self.config.get('players_retention_days', 30),
+            archive_dir=archive_dir,
+            interval=self.config.get('maintenance_interval', 3600)
+        )
+
     def setup_notifications(self):
         """Configurar sistema de notificaciones"""
         self.notification_system = NotificationSystem(self)
 
+    def setup_memory_budget(self):
+        """Pasos de liberación de la interfaz, tras las caches del motor"""
+        self.memory_check_id = None
+        self.engine.memory_budget.add_shedder('history', self.shed_history)
+        self.engine.memory_budget.add_shedder('queue', self.shed_queue)
+        self.schedule_memory_check()
+
+    def schedule_memory_check(self):
+        """Comprobar la memoria periódicamente solo si hay límite"""
+        if self.memory_check_id is not None:
+            self.root.after_cancel(self.memory_check_id)
+            self.memory_check_id = None
+        if self.config.get('memory_budget_mb', 0) > 0:
+            interval = self.config.get('memory_check_interval', 30)
+            self.memory_check_id = self.root.after(int(interval * 1000), self.check_memory_budget)
+
+    def check_memory_budget(self):
+        """Aplicar el límite de memoria en el hilo de Tk (el historial y la vista son suyos)"""
+        self.memory_check_id = None
+        report = self.engine.memory_budget.check()
+        if report:
+            self.add_message(report, "warning")
+        self.schedule_memory_check()
+
+    def shed_history(self):
+        """Segundo paso: reducir el historial a la mitad (hasta 1000); Aplicar lo restaura"""
+        capacity = self.message_ring.capacity
+        new_capacity = max(1000, capacity // 2)
+        if new_capacity >= capacity:
+            return None
+        self.message_ring.resize(new_capacity)
+        self.message_count = len(self.message_ring)
+        self.msg_count_label.config(text=f"Mensajes: {self.message_count}")
+        self.message_view.refresh()
+        return f"historial {capacity}→{new_capacity} mensajes"
+
+    def shed_queue(self):
+        """Último paso: resumir los eventos pendientes de pintar"""
+        shed = self.message_queue.shed(keep=100)
+        return f"{shed} eventos en cola resumidos" if shed else None
+
+    def update_metrics_server(self):
+        """Arrancar, mover o detener el endpoint de métricas según la configuración"""
+        port = self.metrics_port
+        if port is None and self.config.get('metrics_enabled', False):
+            port = self.config.get('metrics_port', 9464)
+
+        if self.metrics_server and self.metrics_server.port != port:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if port and not self.metrics_server:
+            server = MetricsServer([self.engine.collect_metrics, self.collect_ui_metrics], port=port)
+            if server.start():
+                self.metrics_server = server
+            else:
+                self.add_message(f"No se pudo abrir el puerto de métricas {port}", "warning")
+
+    def collect_ui_metrics(self):
+        """Métricas de la interfaz; solo lee contadores, nunca llama a Tk"""
+        return [
+            ('sc_monitor_ui_queue_depth', 'gauge', "Mensajes pendientes de pintar",
+             [('', {}, self.message_queue.qsize())]),
+            ('sc_monitor_ui_queue_dropped_total', 'counter', "Mensajes descartados por saturación de la cola",
+             [('', {}, self.message_queue.dropped_count())]),
+            ('sc_monitor_ui_history_messages', 'gauge', "Mensajes en el historial",
+             [('', {}, self.message_count)]),
+        ]
+
     def load_logo(self):
         """Cargar el logo de la aplicación"""
         try:
-            # Intentar cargar PNG primero
+            # PNG con el soporte nativo de Tk: no hace falta cargar PIL al arrancar
             png_path = get_resource_path('logoStar.png')
             if os.path.exists(png_path):
-                image = Image.open(png_path)
-                image = image.resize((32, 32), Image.Resampling.LANCZOS)
-                self.logo = ImageTk.PhotoImage(image)
+                image = tk.PhotoImage(file=png_path)
+                self.logo = image.subsample(max(1, image.width() // 32))
                 return True
 
-            # Si no hay PNG, intentar ICO
+            # Si no hay PNG, intentar ICO (requiere PIL)
             ico_path = get_resource_path('logoStar.ico')
             if os.path.exists(ico_path):
+                from PIL import Image, ImageTk
                 image = Image.open(ico_path)
                 image = image.resize((32, 32), Image.Resampling.LANCZOS)
                 self.logo = ImageTk.PhotoImage(image)
@@ -1240,42 +4029,8 @@ class StarCitizenLogMonitor:
 
     def load_config(self):
         """Cargar configuración desde archivo"""
-        self.config = {
-            'current_user': 'Por defecto',
-            'log_filename': r'C:\Program Files\Roberts Space Industries\StarCitizen\LIVE\Game.log',
-            'crew_nicks': [],
-            'players_blacklist': [],
-            'players_whitelist': [],
-            'orgs_blacklist': [],
-            'orgs_whitelist': [],
-            'auto_start': False,
-            'save_position': True,
-            'show_direction': True,
-            'web_info': True,
-            'notifications': True,
-            'transparency': 0.9,
-            'font_size': 10,
-            'theme': 'dark',
-            'overlay_position': 'top',
-            'window_geometry': '900x250+100+100',
-            'overlay_geometry': '800x120+100+10',
-            'show_deaths': True,
-            'show_missiles': True,
-            'show_vehicles': True,
-            'show_spawns': True,
-            'update_interval': 500,
-            'message_limit': 1000,
-            'save_stats': True,
-            'cache_players': True
-        }
-
-        try:
-            if os.path.exists("sc_monitor_config.json"):
-                with open("sc_monitor_config.json", 'r') as f:
-                    saved_config = json.load(f)
-                    self.config.update(saved_config)
-        except Exception as e:
-            logger.error(f"Error cargando configuración: {e}")
+        self.config = load_config_file()
+        self.config_writer = ConfigWriter(CONFIG_FILE)
 
     def setup_window(self):
         """Configurar la ventana principal"""
@@ -1323,22 +4078,22 @@ class StarCitizenLogMonitor:
 
     def setup_variables(self):
         """Configurar variables del monitor"""
-        self.player_info_cache = {}
-        self.messages_shown = set()
-        self.message_queue = queue.Queue()
-        self.monitoring = False
-        self.monitor_thread = None
-        self.last_file_position = 0
+        self.message_queue = UIEventQueue(self.config.get('ui_queue_size', 5000),
+                                          self.config.get('ui_overload_policy', 'drop_oldest'))
         self.message_count = 0
+        self.render_cost_per_line = 0.0001  # segundos, se ajusta al medir
+        self.overlay = None
+        self.notification_system = None
+        self.geometry_after_id = None
+        self.message_ring = MessageRing(self.config.get('message_limit', 100000))
+
+        # Motor de análisis; la interfaz solo se suscribe a sus eventos
+        self.engine = LogEngine(self.config, self.db_manager)
+        self.engine.subscribe(self.on_engine_event)
 
         # Variables de la configuración
         self.CURRENT_USER = self.config.get('current_user', 'Por defecto')
-        self.LOG_FILENAME = self.config.get('log_filename', r'C:\Program Files\Roberts Space Industries\StarCitizen\LIVE\Game.log')
         self.CREW_NICKS = self.config.get('crew_nicks', [])
-        self.PLAYERS_BLACKLIST = self.config.get('players_blacklist', [])
-        self.PLAYERS_WHITELIST = self.config.get('players_whitelist', [])
-        self.ORGS_BLACKLIST = self.config.get('orgs_blacklist', [])
-        self.ORGS_WHITELIST = self.config.get('orgs_whitelist', [])
 
         # Colores ANSI (para uso interno)
         self.GREEN = "\033[92m"
@@ -1403,6 +4158,12 @@ class StarCitizenLogMonitor:
             bg='#404040', fg='white', relief=tk.FLAT, width=10)
         self.stats_button.pack(side=tk.LEFT, padx=(0, 5))
 
+        # Botón de búsqueda
+        self.search_button = tk.Button(control_frame, text="🔍 Buscar", 
+            command=self.open_search,
+            bg='#404040', fg='white', relief=tk.FLAT, width=10)
+        self.search_button.pack(side=tk.LEFT, padx=(0, 5))
+
         # Checkbox para overlay mode
         self.overlay_var = tk.BooleanVar()
         self.overlay_check = tk.Checkbutton(control_frame, text="Modo Overlay", 
@@ -1432,6 +4193,11 @@ class StarCitizenLogMonitor:
                                       bg='#1a1a1a', fg='#cccccc', font=('Arial', 9))
         self.msg_count_label.pack(side=tk.LEFT, padx=(2, 0))
 
+        # Aviso de mensajes pendientes cuando la UI va por detrás
+        self.backlog_label = tk.Label(info_frame, text="", 
+                                    bg='#1a1a1a', fg='#ff8800', font=('Arial', 9))
+        self.backlog_label.pack(side=tk.LEFT, padx=(10, 0))
+
         # Área de mensajes
         self.setup_message_area(main_frame)
 
@@ -1441,18 +4207,11 @@ class StarCitizenLogMonitor:
         message_frame = tk.Frame(parent, bg='#1a1a1a')
         message_frame.pack(fill=tk.BOTH, expand=True)
 
-        # Texto con scroll
+        # Vista virtualizada sobre el historial en memoria
         font_size = self.config.get('font_size', 10)
-        self.text_area = scrolledtext.ScrolledText(
-            message_frame,
-            wrap=tk.WORD,
-            bg='#2a2a2a',
-            fg='#ffffff',
-            insertbackground='white',
-            font=('Consolas', font_size),
-            height=10
-        )
-        self.text_area.pack(fill=tk.BOTH, expand=True)
+        self.message_view = MessageView(message_frame, self.message_ring, ('Consolas', font_size))
+        self.message_view.pack(fill=tk.BOTH, expand=True)
+        self.text_area = self.message_view.text
 
         # Configurar tags para colores
         self.text_area.tag_configure("user", foreground="#ffff00")      # Amarillo
@@ -1491,17 +4250,18 @@ class StarCitizenLogMonitor:
     def copy_text(self):
         """Copiar texto seleccionado"""
         try:
-            selected_text = self.text_area.selection_get()
+            if self.message_view.all_selected:
+                selected_text = self.message_ring.get_text()
+            else:
+                selected_text = self.text_area.selection_get()
             self.root.clipboard_clear()
             self.root.clipboard_append(selected_text)
         except tk.TclError:
             pass
 
     def select_all_text(self):
-        """Seleccionar todo el texto"""
-        self.text_area.tag_add(tk.SEL, "1.0", tk.END)
-        self.text_area.mark_set(tk.INSERT, "1.0")
-        self.text_area.see(tk.INSERT)
+        """Seleccionar todo el historial"""
+        self.message_view.select_all()
 
     def export_log(self):
         """Exportar log actual a archivo"""
@@ -1513,7 +4273,7 @@ class StarCitizenLogMonitor:
             )
 
             if filename:
-                content = self.text_area.get("1.0", tk.END)
+                content = self.message_ring.get_text()
                 with open(filename, 'w', encoding='utf-8') as f:
                     f.write(content)
 
@@ -1529,225 +4289,109 @@ class StarCitizenLogMonitor:
             logger.error(f"Error exportando log: {e}")
             messagebox.showerror("Error", f"Error exportando log: {e}")
 
-    def setup_monitoring(self):
-        """Configurar el sistema de monitoreo"""
-        # Iniciar el procesador de mensajes
-        update_interval = self.config.get('update_interval', 100)
-        self.root.after(update_interval, self.process_message_queue)
-
-
-    def open_config(self):
-        """Abrir ventana de configuración"""
-        config_window = ConfigWindow(self, self.config)
-
-    def open_stats(self):
-        """Abrir ventana de estadísticas"""
-        if self.db_manager:
-            stats_window = StatsWindow(self, self.db_manager)
-        else:
-            messagebox.showwarning("Base de datos no disponible", 
-                                 "No se puede acceder a las estadísticas sin base de datos")
-
-    def apply_config(self, new_config):
-        """Aplicar nueva configuración"""
-        self.config.update(new_config)
-        self.save_config()
-
-        # Actualizar variables
-        self.CURRENT_USER = self.config.get('current_user', 'Por defecto')
-        self.LOG_FILENAME = self.config.get('log_filename', '')
-        self.CREW_NICKS = self.config.get('crew_nicks', [])
-        self.PLAYERS_BLACKLIST = self.config.get('players_blacklist', [])
-        self.PLAYERS_WHITELIST = self.config.get('players_whitelist', [])
-        self.ORGS_BLACKLIST = self.config.get('orgs_blacklist', [])
-        self.ORGS_WHITELIST = self.config.get('orgs_whitelist', [])
-
-        # Actualizar UI
-        self.user_label.config(text=self.CURRENT_USER)
-        crew_count = len(self.CREW_NICKS)
-        self.crew_label.config(text=f"{crew_count} miembros")
-
-        # Aplicar transparencia
-        transparency = self.config.get('transparency', 0.9)
-        self.root.wm_attributes("-alpha", transparency)
-
-        # Aplicar tamaño de fuente
-        font_size = self.config.get('font_size', 10)
-        self.text_area.config(font=('Consolas', font_size))
-
-        # Guardar configuración
-        self.save_config()
-
-        self.add_message("Configuración aplicada correctamente", "info")
-
-    def get_actor_info(self, actor_name, actor_id=None):
-        """Obtener información mejorada del actor"""
-        if actor_id and actor_id in actor_name:
-            # Es un PNJ, limpiar nombre
-            return actor_name[:-(len(actor_id)+1)]
-        else:
-            # Verificar si es un PNJ con patrón
-            match = re.search(r"(.+)_\d{6,14}", actor_name)
-            if match:
-                return match.group(1)
-            else:
-                # Es un jugador real, obtener info web si está habilitado
-                return self.get_web_info(actor_name)
-
-    def get_web_info(self, player_handle):
-        """Obtener información web del jugador"""
-        if not self.config.get('web_info', True):
-            return player_handle
-
-        # Verificar cache en memoria primero
-        if player_handle in self.player_info_cache:
-            player_info = self.player_info_cache[player_handle]
-        else:
-            # Verificar cache en base de datos
-            if self.db_manager and self.config.get('cache_players', True):
-                player_info = self.db_manager.get_player_info(player_handle)
-                if player_info:
-                    # Convertir a dict para compatibilidad
-                    player_info = {
-                        "mainOrgName": player_info.main_org_name,
-                        "mainOrg": player_info.main_org,
-                        "orgRang": player_info.org_rank,
-                        "enlisted": player_info.enlisted,
-                        "location": player_info.location,
-                        "fluency": player_info.fluency
-                    }
-                else:
-                    # Obtener información de la web
-                    player_info = self.fetch_player_info(player_handle)
-
-                    # Guardar en base de datos
-                    if self.db_manager and player_info:
-                        db_player_info = PlayerInfo(
-                            handle=player_handle,
-                            main_org=player_info.get("mainOrg", ""),
-                            main_org_name=player_info.get("mainOrgName", ""),
-                            org_rank=player_info.get("orgRang", ""),
-                            enlisted=player_info.get("enlisted", ""),
-                            location=player_info.get("location", ""),
-                            fluency=player_info.get("fluency", "")
-                        )
-                        self.db_manager.save_player_info(db_player_info)
-            else:
-                # Obtener información de la web directamente
-                player_info = self.fetch_player_info(player_handle)
-
-            # Guardar en cache de memoria
-            self.player_info_cache[player_handle] = player_info
-
-        # Determinar color y información adicional
-        return self.format_player_info(player_handle, player_info)
-
-    def fetch_player_info(self, player_handle):
-        """Obtener información del jugador desde RSI con timeout mejorado"""
-        player_info = {
-            "mainOrgName": "",
-            "mainOrg": "",
-            "orgRang": "",
-            "enlisted": "",
-            "location": "",
-            "fluency": ""
-        }
-
+    def setup_monitoring(self):
+        """Configurar el sistema de monitoreo"""
+        # El procesador de mensajes solo se despierta cuando hay algo en la cola
+        self.ui_tick_id = None
+        self.ui_tick_idle = False
+        self.root.bind('<<MessageQueued>>', self.on_message_queued)
+        self.root.bind('<<ReplayFinished>>', self.on_replay_stopped)
+        self.message_queue.on_wakeup = self.wake_ui
+        self.schedule_ui_tick(self.config.get('update_interval', 100))
+
+    def wake_ui(self):
+        """Despertar el bucle de Tk desde cualquier hilo"""
         try:
-            url = f"https://robertsspaceindustries.com/en/citizens/{player_handle}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            resp = requests.get(url, timeout=10, headers=headers)
-
-            if resp.status_code == 200:
-                text = resp.text
+            self.root.event_generate('<<MessageQueued>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            pass  # La ventana se está cerrando
+
+    def on_message_queued(self, event=None):
+        """Procesar la cola cuanto antes si el bucle estaba en reposo"""
+        if self.ui_tick_id is None or self.ui_tick_idle:
+            self.schedule_ui_tick(0)
+
+    def schedule_ui_tick(self, delay, idle=False):
+        """Programar el siguiente ciclo de process_message_queue"""
+        if self.ui_tick_id is not None:
+            self.root.after_cancel(self.ui_tick_id)
+        self.ui_tick_idle = idle
+        if delay:
+            self.ui_tick_id = self.root.after(delay, self.process_message_queue)
+        else:
+            self.ui_tick_id = self.root.after_idle(self.process_message_queue)
 
-                # Extraer información de la organización con patrones mejorados
-                patterns = {
-                    'mainOrg': r'(?s)<span class="label data\d+">Spectrum Identification \(SID\)</span>.+<strong class="value data\d+">(\w+)</strong>',
-                    'mainOrgName': r'(?s)<a href="\/orgs\/[\w\d]+" class="value data\d+" style="background-position:-\d+px center">\s*([\w\d\s]+)\s*</a>',
-                    'enlisted': r'(?s)<span class="label">Enlisted</span>[\s]+<strong class="value">\s*([\w\d\s]+, \d{4})\s*</strong>',
-                    'fluency': r'(?s)<span class="label">Fluency</span>[\s]+<strong class="value">\s*([\w\d\s,]+[\w\d])\s*</strong>'
-                }
 
-                for key, pattern in patterns.items():
-                    match = re.search(pattern, text)
-                    if match:
-                        value = match.group(1).strip()
-                        if key == 'fluency':
-                            value = value.replace(' ', '')
-                        player_info[key] = value
+    def open_config(self):
+        """Abrir ventana de configuración"""
+        config_window = ConfigWindow(self, self.config)
 
-        except requests.exceptions.Timeout:
-            logger.warning(f"Timeout obteniendo info de {player_handle}")
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Error de red obteniendo info de {player_handle}: {e}")
-        except Exception as e:
-            logger.error(f"Error inesperado obteniendo info de {player_handle}: {e}")
+    def open_stats(self):
+        """Abrir ventana de estadísticas"""
+        if self.db_manager:
+            stats_window = StatsWindow(self, self.db_manager)
+        else:
+            messagebox.showwarning("Base de datos no disponible", 
+                                 "No se puede acceder a las estadísticas sin base de datos")
 
-        return player_info
+    def open_search(self):
+        """Abrir ventana de búsqueda de eventos"""
+        if self.db_manager:
+            SearchWindow(self, self.db_manager)
+        else:
+            messagebox.showwarning("Base de datos no disponible", 
+                                 "No se puede buscar eventos sin base de datos")
 
-    def format_player_info(self, player_handle, player_info):
-        """Formatear información del jugador con colores"""
-        # Información adicional
-        info_parts = []
-        if player_info.get("mainOrg"):
-            org_info = player_info['mainOrg']
-            if player_info.get("mainOrgName"):
-                org_info += f"-{player_info['mainOrgName']}"
-            info_parts.append(org_info)
+    def apply_config(self, new_config):
+        """Aplicar nueva configuración"""
+        self.config.update(new_config)
 
-        if player_info.get("enlisted"):
-            info_parts.append(player_info["enlisted"])
-        if player_info.get("fluency"):
-            info_parts.append(player_info["fluency"])
+        # Actualizar variables
+        self.CURRENT_USER = self.config.get('current_user', 'Por defecto')
+        self.CREW_NICKS = self.config.get('crew_nicks', [])
+        self.engine.apply_config()
 
-        info_text = f" [{' | '.join(info_parts)}]" if info_parts else ""
+        # Actualizar UI
+        self.user_label.config(text=self.CURRENT_USER)
+        crew_count = len(self.CREW_NICKS)
+        self.crew_label.config(text=f"{crew_count} miembros")
 
-        # Determinar tipo de jugador
-        if player_handle.upper() == self.CURRENT_USER.upper():
-            return ("user", f"{player_handle}{info_text}")
-        elif player_handle == 'unknown':
-            return ("neutral", f"{player_handle}{info_text}")
-        elif (player_handle.upper() in [p.upper() for p in self.PLAYERS_BLACKLIST] or
-              player_info.get("mainOrg", "").upper() in [o.upper() for o in self.ORGS_BLACKLIST]):
-            return ("enemy", f"{player_handle}{info_text}")
-        elif (player_handle.upper() in [p.upper() for p in self.PLAYERS_WHITELIST] or
-              player_info.get("mainOrg", "").upper() in [o.upper() for o in self.ORGS_WHITELIST] or
-              player_handle.upper() in [c.upper() for c in self.CREW_NICKS]):
-            return ("friendly", f"{player_handle}{info_text}")
-        else:
-            return ("neutral", f"{player_handle}{info_text}")
+        # Aplicar transparencia
+        transparency = self.config.get('transparency', 0.9)
+        self.root.wm_attributes("-alpha", transparency)
 
-    def get_direction_info(self, x, y, z):
-        """Obtener información de dirección del disparo mejorada"""
-        if not self.config.get('show_direction', True):
-            return ""
+        # Aplicar tamaño de fuente
+        self.message_ring.resize(self.config.get('message_limit', 100000))
+        self.message_queue.policy = self.config.get('ui_overload_policy', 'drop_oldest')
+        font_size = self.config.get('font_size', 10)
+        self.message_view.set_font(('Consolas', font_size))
 
-        try:
-            angle = math.degrees(math.atan2(float(x), float(y)))
-            if angle < 0:
-                angle = angle + 360
+        if self.db_manager:
+            self.apply_retention_config()
+        self.update_metrics_server()
+        self.schedule_memory_check()
 
-            # Convertir ángulo a dirección cardinal
-            directions = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
-            direction_index = int((angle + 22.5) / 45) % 8
-            cardinal = directions[direction_index]
+        # Guardar configuración
+        self.save_config()
 
-            return f" [{round(angle, 1)}° {cardinal}]"
-        except (ValueError, TypeError):
-            return " [?°]"
+        self.add_message("Configuración aplicada correctamente", "info")
 
     def on_window_configure(self, event):
-        """Manejar cambios en la ventana"""
-        if event.widget == self.root and self.config.get('save_position', True):
-            # Guardar geometría actual
+        """Manejar cambios en la ventana (agrupados hasta que se detienen)"""
+        if event.widget is not self.root:
+            return
+        if self.geometry_after_id is not None:
+            self.root.after_cancel(self.geometry_after_id)
+        self.geometry_after_id = self.root.after(500, self.store_window_geometry)
+
+    def store_window_geometry(self):
+        """Guardar la geometría cuando la ventana deja de moverse"""
+        self.geometry_after_id = None
+        if self.overlay is None and self.config.get('save_position', True):
             geometry = self.root.geometry()
-            if self.overlay_var.get():
-                self.config['overlay_geometry'] = geometry
-            else:
+            if geometry != self.config.get('window_geometry'):
                 self.config['window_geometry'] = geometry
+                self.save_config()
 
     def toggle_overlay_mode(self):
         """Activar/desactivar modo overlay"""
@@ -1756,80 +4400,63 @@ class StarCitizenLogMonitor:
             if self.config.get('save_position', True):
                 self.config['window_geometry'] = self.root.geometry()
 
-            # Modo overlay: ventana sin bordes, siempre arriba
-            self.root.wm_attributes("-topmost", True)
-            self.root.overrideredirect(True)
-
-            # Aplicar geometría guardada para overlay o posición predeterminada
-            overlay_geometry = self.config.get('overlay_geometry', '800x120+100+10')
-            self.root.geometry(overlay_geometry)
-
-            # Hacer que se pueda mover arrastrando
-            self.root.bind('<Button-1>', self.start_drag)
-            self.root.bind('<B1-Motion>', self.drag_window)
-
-            # Cambiar transparencia para overlay
-            self.root.wm_attributes("-alpha", 0.8)
+            # El overlay es una ventana aparte; la principal se oculta
+            self.overlay = OverlayRenderer(
+                self,
+                self.config.get('overlay_geometry', '800x120+100+10'),
+                ('Consolas', self.config.get('font_size', 10)),
+                fps=self.config.get('overlay_fps', 10)
+            )
+            self.overlay.push(self.message_ring.slice(max(0, len(self.message_ring) - self.overlay.lines.maxlen),
+                                                      self.overlay.lines.maxlen))
+            self.root.withdraw()
 
-        else:
+        elif self.overlay:
             # Guardar posición overlay actual
             if self.config.get('save_position', True):
-                self.config['overlay_geometry'] = self.root.geometry()
+                self.config['overlay_geometry'] = self.overlay.geometry()
+            self.overlay.destroy()
+            self.overlay = None
 
             # Modo normal
-            self.root.wm_attributes("-topmost", False)
-            self.root.overrideredirect(False)
-
-            # Restaurar geometría normal
+            self.root.deiconify()
             window_geometry = self.config.get('window_geometry', '900x250+100+100')
             self.root.geometry(window_geometry)
 
-            # Remover bindings de arrastre
-            self.root.unbind('<Button-1>')
-            self.root.unbind('<B1-Motion>')
-
-            # Restaurar transparencia normal
-            transparency = self.config.get('transparency', 0.9)
-            self.root.wm_attributes("-alpha", transparency)
-
-    def start_drag(self, event):
-        """Iniciar arrastre de ventana"""
-        self.drag_start_x = event.x
-        self.drag_start_y = event.y
+            # Ponerse al día con lo recibido durante el overlay
+            self.message_view.render()
 
-    def drag_window(self, event):
-        """Arrastrar ventana"""
-        x = self.root.winfo_pointerx() - self.drag_start_x
-        y = self.root.winfo_pointery() - self.drag_start_y
-        self.root.geometry(f"+{x}+{y}")
+    def exit_overlay_mode(self):
+        """Volver a la ventana normal desde el overlay"""
+        self.overlay_var.set(False)
+        self.toggle_overlay_mode()
 
     def start_monitoring(self):
         """Iniciar el monitoreo del log"""
-        if not self.monitoring:
+        if not self.engine.monitoring:
             # Verificar que existe el archivo de log
-            if not os.path.exists(self.LOG_FILENAME):
-                error_msg = f"No se encuentra el archivo de log: {self.LOG_FILENAME}"
+            log_filename = self.replay.path if self.replay else self.engine.LOG_FILENAME
+            if not os.path.exists(log_filename):
+                error_msg = f"No se encuentra el archivo de log: {log_filename}"
                 self.add_message(error_msg, "warning")
                 messagebox.showerror("Error", error_msg)
                 return
 
-            self.monitoring = True
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
-            self.status_label.config(text="● Conectado", fg='#00ff00')
 
-            # Obtener posición actual del archivo
-            try:
-                with open(self.LOG_FILENAME, 'r', encoding="latin1") as f:
-                    f.seek(0, 2)  # Ir al final
-                    self.last_file_position = f.tell()
-            except Exception as e:
-                logger.error(f"Error obteniendo posición del archivo: {e}")
-                self.last_file_position = 0
+            if self.replay:
+                # El log grabado sustituye al seguimiento en vivo
+                self.status_label.config(text=f"● Reproduciendo {self.replay.speed_label}", fg='#ffaa00')
+                self.replay.on_finished = self.on_replay_finished
+                self.engine.start(source=self.replay)
+                self.add_message(f"Reproduciendo {os.path.basename(log_filename)} a {self.replay.speed_label}", "success")
+                return
+
+            self.status_label.config(text="● Conectado", fg='#00ff00')
 
-            # Iniciar thread de monitoreo
-            self.monitor_thread = threading.Thread(target=self.monitor_log, daemon=True)
-            self.monitor_thread.start()
+            # Seguir el log desde el final en el hilo del motor
+            self.engine.start(from_end=True)
 
             self.add_message("Sistema iniciado - Monitoreando eventos de combate", "success")
 
@@ -1842,7 +4469,7 @@ class StarCitizenLogMonitor:
 
     def stop_monitoring(self):
         """Detener el monitoreo"""
-        self.monitoring = False
+        self.engine.stop()
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.status_label.config(text="● Desconectado", fg='#ff0000')
@@ -1855,275 +4482,121 @@ class StarCitizenLogMonitor:
                 "warning"
             )
 
+    def on_replay_finished(self, replay):
+        """Fin de la reproducción (hilo lector): Iniciar la repite desde el principio"""
+        logger.info(replay.summary())
+        self.add_message(replay.summary(), "info")
+        # Los widgets solo se tocan desde el hilo de Tk
+        try:
+            self.root.event_generate('<<ReplayFinished>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            pass  # La ventana se está cerrando
+
+    def on_replay_stopped(self, event=None):
+        """Dejar los controles listos para repetir la reproducción"""
+        if self.engine.monitoring:
+            return  # Ya se ha vuelto a iniciar
+        self.start_button.config(state=tk.NORMAL)
+        self.stop_button.config(state=tk.DISABLED)
+        self.status_label.config(text="● Reproducción terminada", fg='#ff0000')
+
+    def on_engine_event(self, event):
+        """Receptor de eventos del motor (hilo lector)"""
+        if event.visible:
+            self.add_message(event.text, event.tag, event.kind)
+
+        if event.event_type == 'death' and event.details:
+            killer, victim = event.details['killer'], event.details['victim']
+            if killer == victim or killer == 'unknown':
+                return
+            if killer == self.CURRENT_USER and not self.engine.is_npc(victim, event.details['victim_id']):
+                self.notify("Baja confirmada", f"Has eliminado a {victim}", "success", group='kill')
+            elif victim == self.CURRENT_USER:
+                self.notify("Has muerto", f"Eliminado por {killer}", "error", group='death')
+
+    def notify(self, title, message, notification_type="info", group=None):
+        """Notificación emergente si están activadas"""
+        if self.config.get('notifications', True) and self.notification_system:
+            self.notification_system.show_notification(title, message, notification_type, group=group)
+
     def clear_messages(self):
         """Limpiar el área de mensajes"""
-        self.text_area.delete(1.0, tk.END)
-        self.messages_shown.clear()
+        self.message_view.clear()
         self.message_count = 0
         self.msg_count_label.config(text="Mensajes: 0")
         self.add_message("Área de mensajes limpiada", "info")
 
-    def add_message(self, message, msg_type="normal"):
-        """Añadir mensaje a la cola"""
+    def add_message(self, message, msg_type="normal", kind=None):
+        """Añadir mensaje a la cola; kind marca los de baja prioridad"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.message_queue.put((timestamp, message, msg_type))
+        self.message_queue.put(timestamp, message, msg_type, kind)
 
     def process_message_queue(self):
-        """Procesar cola de mensajes con límite"""
-        try:
-            processed = 0
-            max_process = 10  # Procesar máximo 10 mensajes por ciclo
-
-            while processed < max_process:
-                timestamp, message, msg_type = self.message_queue.get_nowait()
-
-                # Verificar límite de mensajes
-                message_limit = self.config.get('message_limit', 1000)
-                if self.message_count >= message_limit:
-                    # Eliminar las primeras líneas
-                    lines_to_remove = min(100, self.message_count - message_limit + 100)
-                    for _ in range(lines_to_remove):
-                        self.text_area.delete("1.0", "2.0")
-                    self.message_count -= lines_to_remove
-
-                # Insertar timestamp
-                self.text_area.insert(tk.END, f"[{timestamp}] ", "timestamp")
-
-                # Procesar mensaje con colores
-                self.insert_colored_message(message, msg_type)
-
-                # Nueva línea
-                self.text_area.insert(tk.END, "\n")
+        """Vaciar la cola de mensajes dentro de un presupuesto de tiempo por ciclo"""
+        self.ui_tick_id = None
+        update_interval = self.config.get('update_interval', 100)
+        budget = self.config.get('ui_frame_budget_ms', 15) / 1000
 
-                # Incrementar contador
-                self.message_count += 1
+        # Líneas que caben en el presupuesto según el coste medio medido
+        max_lines = max(50, int(budget / self.render_cost_per_line))
 
-                # Scroll automático
-                self.text_area.see(tk.END)
+        records = [MessageRecord(timestamp, message, msg_type if msg_type in self.MESSAGE_TAGS else "")
+                   for timestamp, message, msg_type in self.message_queue.get_batch(max_lines)]
 
-                processed += 1
+        processed = len(records)
+        if processed:
+            start = time.perf_counter()
 
-            # Actualizar contador en UI
+            # El historial es la fuente de verdad; la vista pinta solo lo visible
+            self.message_ring.extend(records)
+            if self.overlay:
+                # Con el overlay activo la ventana principal está oculta
+                self.overlay.push(records)
+            else:
+                self.message_view.refresh()
+            self.message_count = len(self.message_ring)
             self.msg_count_label.config(text=f"Mensajes: {self.message_count}")
 
-        except queue.Empty:
-            pass
-
-        # Programar siguiente procesamiento
-        update_interval = self.config.get('update_interval', 100)
-        self.root.after(update_interval, self.process_message_queue)
-
-    def insert_colored_message(self, message, msg_type):
-        """Insertar mensaje con colores apropiados"""
-        if msg_type in ["info", "user", "crew", "enemy", "friendly", "neutral", "warning", "success"]:
-            self.text_area.insert(tk.END, message, msg_type)
+            # Media móvil del coste por línea
+            elapsed = time.perf_counter() - start
+            self.engine.performance_monitor.record_update_time(elapsed)
+            cost = elapsed / processed
+            self.render_cost_per_line = 0.8 * self.render_cost_per_line + 0.2 * max(cost, 1e-6)
+
+        # Con cola pendiente se vuelve antes, en proporción a lo que queda
+        backlog = self.message_queue.qsize()
+        backlog_text = f"⏳ Retraso: {backlog} eventos" if backlog else ""
+        if self.backlog_label.cget('text') != backlog_text:
+            self.backlog_label.config(text=backlog_text)
+        if backlog:
+            self.schedule_ui_tick(max(1, int(update_interval * (1 - min(backlog, max_lines) / max_lines))))
         else:
-            self.text_area.insert(tk.END, message)
-
-    def process_log_line(self, line):
-        """Process a single log line and extract relevant information"""
-        try:
-            # Parse timestamp
-            timestamp_match = re.search(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z)', line)
-            if not timestamp_match:
-                return
-
-            timestamp_str = timestamp_match.group(1)
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-
-            # Check for different message types
-            message_data = None
-
-            # Chat messages
-            chat_match = re.search(r'<(.+?)>\s*(.+)', line)
-            if chat_match and 'Chat' in line:
-                player_name = chat_match.group(1).strip()
-                message_content = chat_match.group(2).strip()
-
-                # Determine channel
-                channel = 'Global'
-                if 'Party' in line:
-                    channel = 'Party'
-                elif 'Org' in line:
-                    channel = 'Organization'
-                elif 'Local' in line:
-                    channel = 'Local'
-
-                message_data = MessageData(
-                    timestamp=timestamp,
-                    player_name=player_name,
-                    message=message_content,
-                    message_type='chat',
-                    channel=channel
-                )
-
-            # System messages
-            elif any(keyword in line.lower() for keyword in ['joined', 'left', 'disconnected', 'connected']):
-                if 'joined' in line.lower():
-                    player_match = re.search(r'(.+?)\s+joined', line, re.IGNORECASE)
-                    if player_match:
-                        player_name = player_match.group(1).strip()
-                        message_data = MessageData(
-                            timestamp=timestamp,
-                            player_name=player_name,
-                            message=f"{player_name} joined the server",
-                            message_type='system',
-                            channel='System'
-                        )
-                elif 'left' in line.lower() or 'disconnected' in line.lower():
-                    player_match = re.search(r'(.+?)\s+(?:left|disconnected)', line, re.IGNORECASE)
-                    if player_match:
-                        player_name = player_match.group(1).strip()
-                        message_data = MessageData(
-                            timestamp=timestamp,
-                            player_name=player_name,
-                            message=f"{player_name} left the server",
-                            message_type='system',
-                            channel='System'
-                        )
-
-            # Death messages
-            elif any(keyword in line.lower() for keyword in ['killed', 'died', 'destroyed']):
-                death_match = re.search(r'(.+?)\s+(?:killed|died|was destroyed)', line, re.IGNORECASE)
-                if death_match:
-                    player_name = death_match.group(1).strip()
-                    message_data = MessageData(
-                        timestamp=timestamp,
-                        player_name=player_name,
-                        message=line.strip(),
-                        message_type='death',
-                        channel='System'
-                    )
-
-            # Trade/Economy messages
-            elif any(keyword in line.lower() for keyword in ['purchased', 'sold', 'transaction']):
-                trade_match = re.search(r'(.+?)\s+(?:purchased|sold)', line, re.IGNORECASE)
-                if trade_match:
-                    player_name = trade_match.group(1).strip()
-                    message_data = MessageData(
-                        timestamp=timestamp,
-                        player_name=player_name,
-                        message=line.strip(),
-                        message_type='trade',
-                        channel='System'
-                    )
-
-            if message_data:
-                self.process_message(message_data)
-
-        except Exception as e:
-            print(f"Error processing log line: {e}")
-
-    def update_display(self):
-        """Update the main display with recent messages"""
-        try:
-            # Clear current display
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-
-            # Get recent messages from database
-            messages = self.db_manager.get_recent_messages(limit=self.config.max_display_messages)
-
-            for msg in messages:
-                # Apply filters
-                if not self.should_display_message(msg):
-                    continue
-
-                # Format timestamp
-                local_time = msg.timestamp.replace(tzinfo=timezone.utc).astimezone()
-                time_str = local_time.strftime("%H:%M:%S")
-
-                # Color coding based on message type
-                tags = []
-                if msg.message_type == 'chat':
-                    if msg.channel == 'Party':
-                        tags.append('party')
-                    elif msg.channel == 'Organization':
-                        tags.append('org')
-                    elif msg.channel == 'Local':
-                        tags.append('local')
-                    else:
-                        tags.append('global')
-                elif msg.message_type == 'system':
-                    tags.append('system')
-                elif msg.message_type == 'death':
-                    tags.append('death')
-                elif msg.message_type == 'trade':
-                    tags.append('trade')
-
-                # Insert into tree
-                self.tree.insert('', 0, values=(
-                    time_str,
-                    msg.player_name or 'System',
-                    msg.channel,
-                    msg.message
-                ), tags=tags)
-
-            # Auto-scroll to top (most recent)
-            if self.tree.get_children():
-                self.tree.see(self.tree.get_children()[0])
-
-        except Exception as e:
-            print(f"Error updating display: {e}")
-
-    def should_display_message(self, message_data):
-        """Check if message should be displayed based on filters"""
-        # Check blacklist
-        if message_data.player_name and message_data.player_name.lower() in [name.lower() for name in self.config.blacklisted_players]:
-            return False
-
-        # Check keyword blacklist
-        if any(keyword.lower() in message_data.message.lower() for keyword in self.config.blacklisted_keywords):
-            return False
-
-        # Check channel filters
-        if message_data.channel == 'Global' and not self.config.show_global_chat:
-            return False
-        if message_data.channel == 'Local' and not self.config.show_local_chat:
-            return False
-        if message_data.channel == 'Party' and not self.config.show_party_chat:
-            return False
-        if message_data.channel == 'Organization' and not self.config.show_org_chat:
-            return False
-        if message_data.message_type == 'system' and not self.config.show_system_messages:
-            return False
-        if message_data.message_type == 'death' and not self.config.show_death_messages:
-            return False
-        if message_data.message_type == 'trade' and not self.config.show_trade_messages:
-            return False
-
-        return True
-
-    def setup_styles(self):
-        """Setup custom styles for the treeview"""
-        style = ttk.Style()
-
-        # Configure tag colors
-        self.tree.tag_configure('global', background='#f0f0f0')
-        self.tree.tag_configure('local', background='#e6f3ff')
-        self.tree.tag_configure('party', background='#e6ffe6')
-        self.tree.tag_configure('org', background='#fff0e6')
-        self.tree.tag_configure('system', background='#ffe6e6', foreground='#666666')
-        self.tree.tag_configure('death', background='#ffcccc', foreground='#cc0000')
-        self.tree.tag_configure('trade', background='#ffffcc', foreground='#cc6600')
+            # En reposo solo queda un temporizador largo de respaldo; la
+            # siguiente llegada a la cola despierta el bucle con un evento
+            self.schedule_ui_tick(self.config.get('ui_idle_fallback_ms', 5000), idle=True)
 
     def on_closing(self):
         """Handle application closing"""
         try:
             # Save current window position and size
-            self.config.window_x = self.root.winfo_x()
-            self.config.window_y = self.root.winfo_y()
-            self.config.window_width = self.root.winfo_width()
-            self.config.window_height = self.root.winfo_height()
+            if self.config.get('save_position', True):
+                if self.overlay:
+                    self.config['overlay_geometry'] = self.overlay.geometry()
+                else:
+                    self.config['window_geometry'] = self.root.geometry()
 
-            # Save configuration
+            # Save configuration (espera a que termine la escritura)
             self.save_config()
+            self.config_writer.close()
 
             # Stop monitoring
-            self.monitoring = False
+            self.engine.stop()
+            self.engine.profiler.stop()
+            if self.metrics_server:
+                self.metrics_server.stop()
 
-            # Close database connection
-            if hasattr(self, 'db_manager'):
+            # Close database connection (vuelca las estadísticas pendientes)
+            if self.db_manager:
                 self.db_manager.close()
 
             # Destroy window
@@ -2142,10 +4615,284 @@ class StarCitizenLogMonitor:
             print(f"Error running application: {e}")
 
 
-def main():
+def collect_log_files(paths) -> List[str]:
+    """Archivos de log a analizar: los indicados y los *.log de cada directorio"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(str(p) for p in Path(path).rglob('*.log')))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            logger.error(f"No se encuentra el archivo de log: {path}")
+    return files
+
+
+def split_log_chunks(path: str, chunk_size: int) -> List[Tuple[str, int, int]]:
+    """Dividir un archivo en rangos [inicio, fin) que empiezan y acaban en un límite de línea"""
+    size = os.path.getsize(path)
+    chunks = []
+    start = 0
+    with open(path, 'rb') as f:
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                # Completar la línea en curso
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            else:
+                end = size
+            chunks.append((path, start, end))
+            start = end
+    return chunks
+
+
+def analyze_log_chunk(task) -> Dict:
+    """Analizar un rango de un log con las reglas del monitor y devolver agregados parciales"""
+    path, start, end, since, until = task
+    result = {'lines': 0, 'errors': 0, 'types': {}, 'players': {}, 'first': None, 'last': None}
+    types, players = result['types'], result['players']
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode('latin1').split('\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    result['lines'] = len(lines)
+
+    for line in lines:
+        try:
+            message_data = parse_log_line(line)
+        except Exception:
+            result['errors'] += 1
+            continue
+        if not message_data:
+            continue
+
+        timestamp = message_data.timestamp
+        if (since and timestamp < since) or (until and timestamp >= until):
+            continue
+        if result['first'] is None or timestamp < result['first']:
+            result['first'] = timestamp
+        if result['last'] is None or timestamp > result['last']:
+            result['last'] = timestamp
+
+        types[message_data.message_type] = types.get(message_data.message_type, 0) + 1
+        for player, stat_type in combat_stats(message_data):
+            stats = players.get(player)
+            if stats is None:
+                stats = players[player] = dict.fromkeys(STAT_COLUMNS, 0)
+            stats[stat_type] += 1
+    return result
+
+
+def merge_log_analysis(total: Dict, part: Dict):
+    """Sumar los agregados parciales de un rango al total"""
+    total['lines'] += part['lines']
+    total['errors'] += part['errors']
+    for message_type, count in part['types'].items():
+        total['types'][message_type] = total['types'].get(message_type, 0) + count
+    for player, stats in part['players'].items():
+        merged = total['players'].setdefault(player, dict.fromkeys(STAT_COLUMNS, 0))
+        for stat_type, value in stats.items():
+            merged[stat_type] += value
+    for key, pick in (('first', min), ('last', max)):
+        if part[key] is not None:
+            total[key] = part[key] if total[key] is None else pick(total[key], part[key])
+
+
+def parse_cli_datetime(value: str) -> datetime:
+    """Fecha de la línea de comandos (ISO, UTC si no lleva zona); tipo de argparse"""
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha no válida: {value!r} (formato ISO, p. ej. 2025-01-31 o 2025-01-31T18:00)")
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def run_log_analysis(args):
+    """Analizar logs completos sin interfaz usando un proceso por núcleo"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    files = collect_log_files(args.analyze)
+    if not files:
+        return 1
+
+    since, until = args.since, args.until
+    workers = args.workers or os.cpu_count() or 1
+    total_bytes = sum(os.path.getsize(path) for path in files)
+
+    # Rangos suficientes para repartir la carga entre todos los procesos
+    chunk_size = max(1 << 20, min(args.chunk_mb << 20, -(-total_bytes // (workers * 4))))
+    tasks = [(*chunk, since, until) for path in files for chunk in split_log_chunks(path, chunk_size)]
+
+    total = {'lines': 0, 'errors': 0, 'types': {}, 'players': {}, 'first': None, 'last': None}
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        for part in map(analyze_log_chunk, tasks):
+            merge_log_analysis(total, part)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            for part in executor.map(analyze_log_chunk, tasks):
+                merge_log_analysis(total, part)
+    elapsed = time.perf_counter() - start
+
+    # Organizaciones conocidas por la cache de jugadores del monitor. Solo lectura y sin
+    # DatabaseManager: el análisis no debe migrar ni bloquear la base del monitor
+    orgs = {}
+    if args.db and os.path.exists(args.db):
+        try:
+            uri = Path(args.db).resolve().as_uri() + "?mode=ro"
+            with contextlib.closing(sqlite3.connect(uri, uri=True)) as conn:
+                orgs = dict(conn.execute("SELECT handle, COALESCE(main_org, '') FROM players"))
+        except Exception as e:
+            logger.error(f"Error obteniendo organizaciones: {e}")
+
+    rows = {}
+    for player, stats in total['players'].items():
+        key = player if args.group_by == 'player' else orgs.get(player) or "(sin org)"
+        row = rows.setdefault(key, {'players': 0, **dict.fromkeys(STAT_COLUMNS, 0)})
+        row['players'] += 1
+        for stat_type, value in stats.items():
+            row[stat_type] += value
+    for row in rows.values():
+        row['kd'] = round(row['kills'] / row['deaths'], 2) if row['deaths'] else float(row['kills'])
+    ordered = sorted(rows.items(), key=lambda item: (-item[1]['kills'], item[1]['deaths'], item[0]))
+
+    if args.csv:
+        import csv
+        with open(args.csv, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow([args.group_by, 'players', *STAT_COLUMNS, 'kd'])
+            for key, row in ordered:
+                writer.writerow([key, row['players'], *(row[c] for c in STAT_COLUMNS), row['kd']])
+
+    print(f"Archivos: {len(files)}  Rangos: {len(tasks)}  Procesos: {min(workers, len(tasks))}")
+    print(f"Líneas: {total['lines']}  Datos: {total_bytes / (1 << 20):.1f} MB  "
+          f"Tiempo: {elapsed:.2f} s ({total_bytes / (1 << 20) / max(elapsed, 1e-9):.1f} MB/s)")
+    if total['first']:
+        print(f"Periodo: {total['first']:%Y-%m-%d %H:%M} — {total['last']:%Y-%m-%d %H:%M} UTC")
+    print("Eventos: " + (", ".join(f"{t} {c}" for t, c in sorted(total['types'].items())) or "0"))
+    if total['errors']:
+        print(f"Líneas con error: {total['errors']}")
+
+    title = "Jugador" if args.group_by == 'player' else "Organización"
+    print()
+    print(f"{title:<24} {'Jug.':>5} {'Bajas':>7} {'Muertes':>8} {'K/D':>7} {'Vehíc.':>7}")
+    for key, row in ordered[:args.top]:
+        print(f"{key[:24]:<24} {row['players']:>5} {row['kills']:>7} {row['deaths']:>8} "
+              f"{row['kd']:>7.2f} {row['vehicles_destroyed']:>7}")
+    if args.csv:
+        print(f"\nCSV completo: {args.csv}")
+    return 0
+
+
+def run_headless(args):
+    """Seguir el log sin interfaz y escribir cada evento como una línea JSON en stdout"""
+    config = load_config_file(args.config)
+    if args.log:
+        config['log_filename'] = args.log
+    if args.no_web:
+        config['web_info'] = False
+    if args.memory_budget is not None:
+        config['memory_budget_mb'] = args.memory_budget
+
+    db_manager = None if args.no_db else DatabaseManager()
+    engine = LogEngine(config, db_manager)
+    live = not args.no_follow and not (args.replay and args.speed <= 0)
+
+    def write_event(event):
+        sys.stdout.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+        if live:
+            sys.stdout.flush()
+
+    engine.subscribe(write_event)
+    if args.profile:
+        engine.profiler.start('reader')
+    if config.get('memory_budget_mb', 0) > 0:
+        engine.memory_budget.start(config.get('memory_check_interval', 30))
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = MetricsServer([engine.collect_metrics], port=args.metrics_port)
+        metrics_server.start()
+
+    try:
+        if args.replay:
+            replay = ReplaySource(args.replay, args.speed, persist=args.replay_save)
+            engine.monitoring = True
+            replay.run(engine)
+            print(replay.summary(), file=sys.stderr)
+        elif args.from_start:
+            engine.last_file_position = 0
+            engine.read_new_lines()
+        else:
+            engine.last_file_position = os.path.getsize(engine.LOG_FILENAME)
+
+        if not args.no_follow and not args.replay:
+            engine.monitoring = True
+            engine.monitor_log()
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        logger.error(f"Error abriendo el archivo de log: {e}")
+        return 1
+    finally:
+        engine.stop()
+        engine.profiler.stop('reader')
+        engine.memory_budget.stop()
+        if metrics_server:
+            metrics_server.stop()
+        sys.stdout.flush()
+        if db_manager:
+            db_manager.close()
+    return 0
+
+
+def main(argv=None):
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Star Citizen Log Monitor")
+    parser.add_argument('--headless', action='store_true',
+                        help="sin interfaz: eventos como JSON por línea en stdout")
+    parser.add_argument('--config', default=CONFIG_FILE, help="archivo de configuración")
+    parser.add_argument('--log', help="archivo Game.log (por defecto, el de la configuración)")
+    parser.add_argument('--from-start', action='store_true', help="procesar el log desde el principio")
+    parser.add_argument('--no-follow', action='store_true', help="terminar al llegar al final del log")
+    parser.add_argument('--no-db', action='store_true', help="no guardar eventos en la base de datos")
+    parser.add_argument('--no-web', action='store_true', help="no consultar la web de RSI")
+    parser.add_argument('--metrics-port', type=int, metavar='PUERTO',
+                        help="servir métricas en http://127.0.0.1:PUERTO/metrics (y /metrics.json)")
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help="límite de memoria en modo sin interfaz (por defecto, el de la configuración)")
+    parser.add_argument('--profile', action='store_true',
+                        help="perfilar con cProfile y tracemalloc hasta salir (archivos junto a sc_monitor.log)")
+
+    replay = parser.add_argument_group("reproducción")
+    replay.add_argument('--replay', metavar='LOG', help="reproducir un Game.log grabado en lugar del log en vivo")
+    replay.add_argument('--speed', type=float, default=1.0, help="velocidad de reproducción (1 = tiempo real, 0 = máxima)")
+    replay.add_argument('--replay-save', action='store_true', help="guardar eventos y estadísticas de la reproducción")
+
+    analysis = parser.add_argument_group("análisis offline")
+    analysis.add_argument('--analyze', nargs='+', metavar='RUTA',
+                          help="analizar archivos Game.log o directorios de logs y salir")
+    analysis.add_argument('--workers', type=int, default=0, help="procesos (por defecto, uno por núcleo)")
+    analysis.add_argument('--chunk-mb', type=int, default=32, help="tamaño máximo de cada rango en MB")
+    analysis.add_argument('--group-by', choices=('org', 'player'), default='org', help="agrupar por organización o jugador")
+    analysis.add_argument('--since', type=parse_cli_datetime, help="solo eventos desde esta fecha (ISO, UTC)")
+    analysis.add_argument('--until', type=parse_cli_datetime, help="solo eventos anteriores a esta fecha (ISO, UTC)")
+    analysis.add_argument('--top', type=int, default=20, help="filas de la tabla")
+    analysis.add_argument('--csv', help="escribir la tabla completa en CSV")
+    analysis.add_argument('--db', default="sc_monitor.db", help="base de datos con las organizaciones de los jugadores")
+    args = parser.parse_args(argv)
+
+    if args.analyze:
+        return run_log_analysis(args)
+    if args.headless:
+        return run_headless(args)
+
     try:
-        app = StarCitizenLogMonitor()
+        replay = ReplaySource(args.replay, args.speed, persist=args.replay_save) if args.replay else None
+        app = StarCitizenLogMonitor(replay, profile=args.profile, metrics_port=args.metrics_port)
         app.run()
     except Exception as e:
         print(f"Fatal error: {e}")
@@ -2153,10 +4900,6 @@ def main():
         traceback.print_exc()
 
 
-if __name__ == "__main__":
-    main()
-
-
 # Funciones auxiliares adicionales para el monitor de Star Citizen
 
 class LogFileWatcher:
@@ -2197,50 +4940,6 @@ class LogFileWatcher:
             print(f"Error watching log file: {e}")
 
 
-class MessageFilter:
-    """Clase para filtrado avanzado de mensajes"""
-
-    def __init__(self, config):
-        self.config = config
-        self.compiled_patterns = {}
-        self._compile_patterns()
-
-    def _compile_patterns(self):
-        """Compila patrones regex para filtrado eficiente"""
-        try:
-            # Compilar patrones de palabras clave bloqueadas
-            if self.config.blacklisted_keywords:
-                pattern = '|'.join(re.escape(keyword) for keyword in self.config.blacklisted_keywords)
-                self.compiled_patterns['keywords'] = re.compile(pattern, re.IGNORECASE)
-
-            # Compilar patrones de jugadores bloqueados
-            if self.config.blacklisted_players:
-                pattern = '|'.join(re.escape(player) for player in self.config.blacklisted_players)
-                self.compiled_patterns['players'] = re.compile(pattern, re.IGNORECASE)
-
-        except Exception as e:
-            print(f"Error compiling filter patterns: {e}")
-
-    def should_filter_message(self, message_data):
-        """Determina si un mensaje debe ser filtrado"""
-        try:
-            # Filtro por palabras clave
-            if 'keywords' in self.compiled_patterns:
-                if self.compiled_patterns['keywords'].search(message_data.message):
-                    return True
-
-            # Filtro por jugadores
-            if 'players' in self.compiled_patterns and message_data.player_name:
-                if self.compiled_patterns['players'].search(message_data.player_name):
-                    return True
-
-            return False
-
-        except Exception as e:
-            print(f"Error filtering message: {e}")
-            return False
-
-
 class ExportManager:
     """Clase para exportar datos del monitor"""
 
@@ -2296,14 +4995,123 @@ class ExportManager:
             return False
 
 
+class LatencyHistogram:
+    """Histograma de duraciones con cubetas logarítmicas: memoria fija y error relativo ≤ 25 %"""
+
+    __slots__ = ('counts', 'last', 'count', 'total', 'max', 'lock')
+
+    SUBBUCKETS = 4     # cubetas por octava
+    OCTAVES = 28       # de 1 µs a ~4,5 minutos
+
+    def __init__(self):
+        self.counts = [0] * (self.SUBBUCKETS * self.OCTAVES)
+        self.last = len(self.counts) - 1
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # db_write se anota desde varios hilos (volcado, lector, ventanas de estadísticas y búsqueda)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Anotar una duración en segundos (seguro entre hilos)"""
+        # frexp en lugar de log2: µs = m·2^e con 0,5 ≤ m < 1, cubeta = 4·(e - 1) + ⌊8·(m - 0,5)⌋
+        mantissa, exponent = math.frexp(seconds * 1e6)
+        index = 4 * exponent + int(8 * mantissa) - 8
+        if index < 0:
+            index = 0
+        elif index > self.last:
+            index = self.last
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def upper_bound(self, index: int) -> float:
+        """Límite superior (segundos) de una cubeta"""
+        octave, sub = divmod(index, self.SUBBUCKETS)
+        return 2 ** octave * (1 + (sub + 1) / self.SUBBUCKETS) / 1e6
+
+    def percentile(self, fraction: float) -> float:
+        """Duración (segundos) bajo la que queda la fracción indicada de las muestras"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts[:self.last]):
+            seen += count
+            if seen >= target:
+                return min(self.upper_bound(index), self.max)
+        # La última cubeta no tiene límite superior
+        return self.max
+
+    def summary(self) -> Dict:
+        """Resumen en milisegundos"""
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.5) * 1000,
+            'p95_ms': self.percentile(0.95) * 1000,
+            'p99_ms': self.percentile(0.99) * 1000,
+            'max_ms': self.max * 1000
+        }
+
+
 class PerformanceMonitor:
     """Clase para monitorear el rendimiento de la aplicación"""
 
+    # Etapas del pipeline, en orden
+    STAGES = {
+        'read': "Lectura del log",
+        'parse': "Análisis de línea",
+        'enrich_cache': "Info jugador (cache)",
+        'enrich_network': "Info jugador (web)",
+        'rsi_request': "Petición a RSI",
+        'db_write': "Escritura en BD",
+        'ui_render': "Pintado de la UI"
+    }
+
+    # Contadores acumulados desde el arranque
+    COUNTERS = {
+        'player_lookups_memory': "Consultas de jugador resueltas en memoria",
+        'player_lookups_db': "Consultas de jugador resueltas en la base de datos",
+        'player_lookups_network': "Consultas de jugador resueltas en la web de RSI",
+        'rsi_errors': "Peticiones a RSI fallidas (red, timeout o estado HTTP distinto de 200)"
+    }
+
     def __init__(self):
         self.start_time = time.time()
         self.message_count = 0
         self.last_update = time.time()
-        self.update_times = []
+        # Solo los últimos 100 tiempos
+        self.update_times = deque(maxlen=100)
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.lines_total = 0
+        # (instante, líneas acumuladas) como mucho una vez por segundo, último minuto
+        self.line_samples = deque([(time.monotonic(), 0)], maxlen=61)
+
+    def count(self, counter, amount=1):
+        """Incrementa un contador"""
+        self.counters[counter] += amount
+
+    def record_lines(self, count):
+        """Registra líneas leídas del log"""
+        self.lines_total += count
+        now = time.monotonic()
+        if now - self.line_samples[-1][0] >= 1:
+            self.line_samples.append((now, self.lines_total))
+
+    def lines_per_second(self):
+        """Líneas por segundo en el último minuto"""
+        now = time.monotonic()
+        start, lines = self.line_samples[0]
+        return (self.lines_total - lines) / (now - start) if now > start else 0.0
+
+    def record(self, stage, seconds):
+        """Registra la duración de una etapa del pipeline"""
+        self.histograms[stage].record(seconds)
 
     def record_message(self):
         """Registra el procesamiento de un mensaje"""
@@ -2312,9 +5120,11 @@ class PerformanceMonitor:
     def record_update_time(self, update_time):
         """Registra el tiempo de actualización de la UI"""
         self.update_times.append(update_time)
-        # Mantener solo los últimos 100 tiempos
-        if len(self.update_times) > 100:
-            self.update_times.pop(0)
+        self.histograms['ui_render'].record(update_time)
+
+    def percentile(self, stage, fraction):
+        """Percentil (0-1) de una etapa, en segundos"""
+        return self.histograms[stage].percentile(fraction)
 
     def get_stats(self):
         """Obtiene estadísticas de rendimiento"""
@@ -2330,18 +5140,324 @@ class PerformanceMonitor:
             'messages_processed': self.message_count,
             'messages_per_second': self.message_count / uptime if uptime > 0 else 0,
             'average_update_time': avg_update_time,
-            'memory_usage': self._get_memory_usage()
+            'memory_usage': self._get_memory_usage(),
+            'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()}
         }
 
-    def _get_memory_usage(self):
-        """Obtiene el uso de memoria actual"""
+    def _get_memory_usage(self, current_only=False):
+        """Obtiene el uso de memoria actual (memoria residente en MB, sin dependencias externas)
+
+        Con current_only=True devuelve None donde solo se conoce el máximo alcanzado.
+        """
         try:
-            import psutil
-            process = psutil.Process()
-            return process.memory_info().rss / 1024 / 1024  # MB
-        except ImportError:
+            if sys.platform == 'win32':
+                import ctypes
+                from ctypes import wintypes
+
+                class ProcessMemoryCounters(ctypes.Structure):
+                    _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                                ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                                ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                                ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                                ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+                get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+                get_current_process.restype = wintypes.HANDLE
+                get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+                get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+                counters = ProcessMemoryCounters()
+                counters.cb = ctypes.sizeof(counters)
+                if get_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+                    return counters.WorkingSetSize / 1024 / 1024
+                return 0
+
+            if os.path.exists('/proc/self/statm'):
+                with open('/proc/self/statm') as f:
+                    return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+            # Sin /proc (macOS): solo está el máximo alcanzado, en bytes
+            if current_only:
+                return None
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 / 1024
+        except Exception as e:
+            logger.error(f"Error obteniendo uso de memoria: {e}")
             return 0
 
+
+def log_directory() -> str:
+    """Directorio de sc_monitor.log (el del FileHandler configurado o el de trabajo)"""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.FileHandler):
+            return os.path.dirname(handler.baseFilename)
+    return os.path.abspath('.')
+
+
+class MemoryBudget:
+    """Límite de memoria: al superarlo se libera, por orden, lo que cada componente registre"""
+
+    def __init__(self, performance_monitor, budget_mb=0):
+        self.performance_monitor = performance_monitor
+        self.budget_mb = budget_mb  # 0 = sin límite
+        self.shedders = []  # (nombre, función que libera y describe lo liberado) por prioridad
+        self.shed_count = 0
+        self.last_report = ""
+        self.unsupported = False  # sin medida de la memoria actual no se aplica el límite
+        self.stop_event = threading.Event()
+
+    def add_shedder(self, name, shed):
+        self.shedders.append((name, shed))
+
+    def check(self) -> Optional[str]:
+        """Medir la memoria y, si se supera el límite, liberar paso a paso; devuelve el informe"""
+        if self.budget_mb <= 0 or self.unsupported:
+            return None
+        usage = self.performance_monitor._get_memory_usage(current_only=True)
+        if usage is None:
+            # Con solo el máximo alcanzado se liberaría en cada comprobación para siempre
+            self.unsupported = True
+            logger.warning("Límite de memoria desactivado: este sistema no informa de la memoria actual")
+            return None
+        if not usage or usage <= self.budget_mb:
+            return None
+
+        before = usage
+        actions = []
+        for name, shed in self.shedders:
+            try:
+                result = shed()
+            except Exception as e:
+                logger.error(f"Error liberando memoria ({name}): {e}")
+                continue
+            if not result:
+                continue
+            actions.append(result)
+            gc.collect()
+            usage = self.performance_monitor._get_memory_usage(current_only=True) or 0
+            if usage <= self.budget_mb:
+                break
+
+        # Sin nada que liberar no hay nada que contar ni que avisar (el consumo base ya supera el límite)
+        if not actions:
+            return None
+        self.shed_count += 1
+        self.last_report = (f"🧹 Memoria {before:.0f} MB > límite {self.budget_mb} MB: "
+                            f"{'; '.join(actions)} → {usage:.0f} MB")
+        logger.warning(self.last_report)
+        return self.last_report
+
+    def start(self, interval=30):
+        """Comprobar periódicamente en un hilo propio (modo sin interfaz)"""
+        def run():
+            while not self.stop_event.wait(interval):
+                self.check()
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class SessionProfiler:
+    """Perfilado bajo demanda: cProfile por hilo e instantáneas de tracemalloc comparadas"""
+
+    def __init__(self):
+        self.active = False
+        self.profiles = {}  # nombre de hilo -> cProfile.Profile (None si otro perfil ya lo cubre)
+        self.released = threading.Condition()  # avisa a stop() cuando un hilo vuelca su perfil
+        self.stamp = ""
+        self.snapshot = None
+        self.snapshot_count = 0
+        self.started_tracemalloc = False
+        self.files = []
+
+    def path(self, suffix) -> str:
+        return os.path.join(log_directory(), f"sc_monitor-{self.stamp}-{suffix}")
+
+    def start(self, thread_name='ui'):
+        """Empezar a perfilar; el hilo que llama queda incluido"""
+        if self.active:
+            return
+        import tracemalloc
+
+        self.stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.files = []
+        self.snapshot = None
+        self.snapshot_count = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(5)
+            self.started_tracemalloc = True
+        self.active = True
+        self.take_snapshot()
+        self.checkpoint(thread_name)
+        logger.info(f"Perfilado iniciado ({self.stamp})")
+
+    def stop(self, thread_name='ui', timeout=2.0) -> List[str]:
+        """Detener el perfilado; espera a que los demás hilos vuelquen su perfil"""
+        if not self.active:
+            return []
+        import tracemalloc
+
+        self.take_snapshot()
+        self.active = False
+        self.checkpoint(thread_name)
+        # Cada hilo vuelca el suyo en su siguiente checkpoint o al terminar
+        with self.released:
+            if not self.released.wait_for(lambda: not self.profiles, timeout):
+                logger.warning(f"Perfiles sin volcar: {', '.join(self.profiles)}")
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+        logger.info(f"Perfilado detenido: {', '.join(self.files)}")
+        return list(self.files)
+
+    def checkpoint(self, thread_name):
+        """Punto de control de cada hilo perfilado: activa o vuelca su propio perfil"""
+        if self.active:
+            if thread_name not in self.profiles:
+                import cProfile
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Python 3.12+: el primer perfil ya cubre todos los hilos
+                    profile = None
+                self.profiles[thread_name] = profile
+        elif thread_name in self.profiles:
+            self.release(thread_name)
+
+    def release(self, thread_name):
+        """Volcar el perfil de un hilo (al detener el perfilado o al terminar el hilo)"""
+        profile = self.profiles.get(thread_name)
+        if profile is not None:
+            profile.disable()
+            path = self.path(f"{thread_name}.prof")
+            try:
+                profile.dump_stats(path)
+                self.files.append(path)
+            except OSError as e:
+                logger.error(f"Error guardando perfil: {e}")
+        with self.released:
+            self.profiles.pop(thread_name, None)
+            self.released.notify_all()
+
+    def take_snapshot(self) -> Optional[str]:
+        """Guardar una instantánea de memoria y su diferencia con la anterior"""
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        self.snapshot_count += 1
+        path = self.path(f"memoria-{self.snapshot_count}.snapshot")
+        try:
+            snapshot.dump(path)
+            self.files.append(path)
+            if self.snapshot is not None:
+                diff_path = self.path(f"memoria-{self.snapshot_count - 1}-{self.snapshot_count}.txt")
+                with open(diff_path, 'w', encoding='utf-8') as f:
+                    f.write(f"Diferencia de memoria entre instantáneas {self.snapshot_count - 1} y {self.snapshot_count}\n\n")
+                    for stat in snapshot.compare_to(self.snapshot, 'lineno')[:50]:
+                        f.write(f"{stat}\n")
+                self.files.append(diff_path)
+        except OSError as e:
+            logger.error(f"Error guardando instantánea de memoria: {e}")
+            return None
+        self.snapshot = snapshot
+        return path
+
+
+def format_prometheus(metrics) -> str:
+    """Métricas (nombre, tipo, ayuda, [(sufijo, etiquetas, valor)]) en formato de texto de Prometheus"""
+    lines = []
+    for name, kind, help_text, samples in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ("{" + ",".join(f'{key}="{label_value}"' for key, label_value in labels.items()) + "}"
+                          if labels else "")
+            lines.append(f"{name}{suffix}{label_text} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def format_metrics_json(metrics) -> Dict:
+    """Las mismas métricas como diccionario: valor simple o lista de {etiquetas..., value}"""
+    result = {}
+    for name, kind, help_text, samples in metrics:
+        for suffix, labels, value in samples:
+            if labels:
+                result.setdefault(name + suffix, []).append({**labels, 'value': value})
+            else:
+                result[name + suffix] = value
+    return result
+
+
+class MetricsServer:
+    """Endpoint HTTP local con las métricas internas: /metrics (Prometheus) y /metrics.json"""
+
+    def __init__(self, collectors, host='127.0.0.1', port=9464):
+        self.collectors = collectors  # funciones que devuelven listas de métricas
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def collect(self):
+        metrics = []
+        for collector in self.collectors:
+            try:
+                metrics.extend(collector())
+            except Exception as e:
+                logger.error(f"Error recogiendo métricas: {e}")
+        return metrics
+
+    def start(self) -> bool:
+        """Servir en un hilo propio; nunca toca Tk"""
+        from http.server import HTTPServer, BaseHTTPRequestHandler
+        server = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            timeout = 5  # un cliente lento no bloquea el hilo
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path in ('/', '/metrics'):
+                    body = format_prometheus(server.collect()).encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body = json.dumps(format_metrics_json(server.collect()), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # sin una línea de log por petición
+
+        try:
+            self.httpd = HTTPServer((self.host, self.port), MetricsHandler)
+        except OSError as e:
+            logger.error(f"Error iniciando el servidor de métricas en {self.host}:{self.port}: {e}")
+            return False
+
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"Métricas en http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
 class ThemeManager:
     """Sistema de gestión de temas mejorado y funcional"""
 
@@ -2613,3 +5729,10 @@ def setup_logging(debug=False):
 
 # Fin del archivo - Todas las partes están completas
 
+
+if __name__ == "__main__":
+    # Necesario para el pool de procesos del análisis en el ejecutable empaquetado
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
+